@@ -0,0 +1,51 @@
+"""Convert documents to audio files without the GUI
+
+Usage: python batch_convert.py INPUT [INPUT ...] -o OUTPUT_DIR [options]
+
+INPUT may be a document or a folder; folders are searched recursively for
+supported formats. Re-running with the same output folder skips documents
+that were already converted and have not changed since.
+"""
+import argparse
+import os
+import sys
+
+from utils.batch import BatchConverter, find_documents, format_summary
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Convert documents to WAV audio files")
+    parser.add_argument('inputs', nargs='+', help="documents or folders to convert")
+    parser.add_argument('-o', '--output', required=True, help="folder for the audio files")
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help="worker processes, each with its own speech engine (default: all cores)")
+    parser.add_argument('--rate', type=int, default=150, help="speech rate in words per minute")
+    parser.add_argument('--volume', type=float, default=1.0, help="volume from 0.0 to 1.0")
+    parser.add_argument('--voice', default=None, help="pyttsx3 voice id")
+    parser.add_argument('--chapters', action='store_true',
+                        help="write one file per chapter for EPUB books")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv if argv is not None else sys.argv[1:])
+    
+    documents = find_documents(args.inputs)
+    if not documents:
+        print("No supported documents found.")
+        return 1
+    
+    # Keep the folder structure when converting a single folder
+    root = args.inputs[0] if len(args.inputs) == 1 and os.path.isdir(args.inputs[0]) else None
+    properties = {'rate': args.rate, 'volume': args.volume, 'voice': args.voice}
+    converter = BatchConverter(args.output, args.workers, properties, args.chapters)
+    
+    def report(file_path, entry):
+        status = 'skipped' if entry.get('skipped') else entry['status']
+        print(f"[{status}] {file_path}", flush=True)
+    
+    results = converter.run(documents, root, on_result=report)
+    print()
+    print(format_summary(results))
+    return 0 if all(entry.get('status') == 'done' for entry in results.values()) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+"""Benchmark the streaming EPUB reader against ebooklib + BeautifulSoup
+
+Usage: python benchmarks/bench_epub.py [chapters] [paragraphs-per-chapter]
+
+Generates a synthetic EPUB and reports the time to the first chapter, the
+total time and the peak Python memory for both extraction paths.
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from benchmarks.fixtures import make_epub
+from utils.epub_reader import EpubReader
+
+def iter_soup(path):
+    """The previous extraction path: every document item through BeautifulSoup"""
+    import ebooklib
+    from ebooklib import epub
+    from bs4 import BeautifulSoup
+    
+    book = epub.read_epub(path)
+    for item in book.get_items():
+        if item.get_type() == ebooklib.ITEM_DOCUMENT:
+            yield BeautifulSoup(item.get_content(), 'html.parser').get_text()
+
+def measure(open_chapters):
+    start = time.perf_counter()
+    first = None
+    characters = 0
+    for text in open_chapters():
+        if first is None:
+            first = time.perf_counter() - start
+        characters += len(text)
+    elapsed = time.perf_counter() - start
+    
+    # Memory is traced on a second pass; tracing slows the parsers down a lot
+    tracemalloc.start()
+    for _ in open_chapters():
+        pass
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return first, elapsed, peak, characters
+
+def main():
+    chapters = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    paragraphs = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.epub')
+        make_epub(path, chapters, paragraphs)
+        print(f"chapters: {chapters}, size: {os.path.getsize(path) / 1e3:.0f} KB")
+        
+        for name, open_chapters in (('streaming', EpubReader(path).iter_chapters),
+                                    ('soup', lambda: iter_soup(path))):
+            first, elapsed, peak, characters = measure(open_chapters)
+            print(f"{name:<10} first chapter {first * 1000:7.1f} ms, total {elapsed:6.2f}s, "
+                  f"{characters / elapsed / 1e6:5.1f} M chars/s, peak {peak / 1e6:6.1f} MB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Benchmark the page text normalization stage
+
+Usage: python benchmarks/bench_normalize.py [pages]
+
+Generates a synthetic PDF with running headers, page numbers and
+hyphenated, hard-wrapped paragraphs, extracts the raw page text, and
+reports how fast normalization runs in MB/s of input text.
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import fitz  # PyMuPDF
+
+from utils.text_extractor import TextExtractor
+from utils.text_normalizer import normalize_parts
+
+WORDS = ("the reader keeps talking while extraordinary documents arrive in "
+         "unpredictable formats and everybody listens carefully").split()
+
+def wrapped_lines(first, paragraphs, width=70):
+    """Hard-wrap paragraphs like a typesetter, hyphenating long words"""
+    for number in range(first, first + paragraphs):
+        words = [WORDS[(number * 7 + i * i + i) % len(WORDS)] for i in range(60)]
+        words[-1] += "."
+        line = ""
+        for word in words:
+            if len(line) + len(word) + 1 > width:
+                if len(word) > 8:
+                    split = len(word) // 2
+                    yield line + " " + word[:split] + "-"
+                    line = word[split:]
+                else:
+                    yield line
+                    line = word
+            else:
+                line = f"{line} {word}".strip()
+        yield line
+        yield ""
+
+def make_pdf(path, pages):
+    doc = fitz.open()
+    for number in range(pages):
+        lines = list(wrapped_lines(number * 6, 6))
+        page = doc.new_page()
+        page.insert_text((72, 40), "A Synthetic Book - Chapter One", fontsize=9)
+        y = 72
+        for line in lines:
+            page.insert_text((72, y), line, fontsize=10)
+            y += 13
+        page.insert_text((290, 810), str(number + 1), fontsize=9)
+    doc.save(path)
+    doc.close()
+
+def main():
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.pdf')
+        make_pdf(path, pages)
+        raw = [(chunk.kind, chunk.text) for chunk in
+               TextExtractor(pdf_workers=1, normalize=False).iter_chunks(path)]
+    
+    size = sum(len(text.encode('utf-8')) for _, text in raw)
+    start = time.perf_counter()
+    normalized = list(normalize_parts(raw))
+    elapsed = time.perf_counter() - start
+    
+    print(f"pages: {pages}, input: {size / 1e6:.2f} MB")
+    print(f"normalize: {size / 1e6 / elapsed:6.1f} MB/s ({elapsed:.3f}s)")
+    print("--- page 2 before ---")
+    print(raw[1][1][:400])
+    print("--- page 2 after ---")
+    print(normalized[1][1][:400])
+
+if __name__ == "__main__":
+    main()
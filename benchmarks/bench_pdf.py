@@ -0,0 +1,42 @@
+"""Benchmark serial vs. parallel PDF extraction
+
+Usage: python benchmarks/bench_pdf.py [pages] [workers]
+
+Generates a synthetic PDF with the given number of text-heavy pages and
+reports pages per second for the serial loop and the process pool.
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from benchmarks.fixtures import make_pdf
+from utils.text_extractor import TextExtractor
+
+def measure(extractor, path, pages):
+    start = time.perf_counter()
+    count = sum(1 for _ in extractor.iter_chunks(path))
+    elapsed = time.perf_counter() - start
+    assert count == pages
+    return elapsed
+
+def main():
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 1)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.pdf')
+        make_pdf(path, pages)
+        
+        serial = measure(TextExtractor(pdf_workers=1), path, pages)
+        parallel = measure(TextExtractor(pdf_workers=workers), path, pages)
+        
+        print(f"pages: {pages}")
+        print(f"serial:   {pages / serial:8.1f} pages/s ({serial:.2f}s)")
+        print(f"parallel: {pages / parallel:8.1f} pages/s ({parallel:.2f}s, {workers} workers)")
+        print(f"speedup:  {serial / parallel:.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Benchmark the full-text search index
+
+Usage: python benchmarks/bench_search.py [megabytes]
+
+Indexes a synthetic document page by page, as the extraction worker does,
+and reports indexing throughput in MB/s and lookup latency (median and
+99th percentile) for single words and phrases.
+"""
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from benchmarks.fixtures import LINE
+from utils.search_index import SearchIndex
+
+PAGE_CHARS = 3000
+
+def vocabulary(size=5000):
+    """Words with a Zipf-like frequency, so a few are very common"""
+    rng = random.Random(0)
+    words = LINE.lower().replace(".", "").split()
+    while len(words) < size:
+        words.append("".join(rng.choice("etaoinshrdlucmfwyp") for _ in range(rng.randint(3, 10))))
+    weights = [1 / (rank + 1) for rank in range(len(words))]
+    return words, weights
+
+def make_pages(megabytes):
+    """Pages of varied text; every page has a few rare numbered words"""
+    words, weights = vocabulary()
+    rng = random.Random(1)
+    pages = []
+    size = 0
+    while size < megabytes * 1e6:
+        number = len(pages)
+        page_words = [f"page{number}", f"section{number // 10}"]
+        length = len(page_words[0]) + len(page_words[1])
+        while length < PAGE_CHARS:
+            for word in rng.choices(words, weights, k=50):
+                page_words.append(word)
+                length += len(word) + 1
+        text = " ".join(page_words) + "\n"
+        pages.append(text)
+        size += len(text)
+    return pages
+
+def latency(index, queries, rounds):
+    times = []
+    for _ in range(rounds):
+        for query in queries:
+            start = time.perf_counter()
+            index.search(query)
+            times.append(time.perf_counter() - start)
+    times.sort()
+    return statistics.median(times) * 1000, times[int(len(times) * 0.99)] * 1000
+
+def main():
+    megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 10
+    pages = make_pages(megabytes)
+    size = sum(len(page.encode('utf-8')) for page in pages)
+    
+    index = SearchIndex()
+    offset = 0
+    start = time.perf_counter()
+    for page in pages:
+        index.add_chunk(page, offset)
+        offset += len(page)
+    elapsed = time.perf_counter() - start
+    
+    words, _ = vocabulary()
+    rng = random.Random(2)
+    rare = [f"page{rng.randrange(len(pages))}" for _ in range(50)]
+    common = words[:50]
+    # Three-word phrases taken from the text, so they are found
+    phrases = []
+    for _ in range(50):
+        page_words = rng.choice(pages).split()
+        first = rng.randrange(2, len(page_words) - 3)
+        phrases.append(" ".join(page_words[first:first + 3]))
+    mixed = [f"section{rng.randrange(len(pages) // 10 or 1)} {word}" for word in words[:50]]
+    
+    print(f"text: {size / 1e6:.1f} MB, {len(pages)} pages, {index.term_count()} distinct words")
+    print(f"index: {size / 1e6 / elapsed:6.1f} MB/s ({elapsed:.2f}s, {elapsed / len(pages) * 1000:.2f} ms per page)")
+    for label, queries in (("rare word", rare), ("common word", common),
+                           ("phrase", phrases), ("rare + common", mixed)):
+        median, p99 = latency(index, queries, 5)
+        print(f"{label:14} median {median:7.3f} ms  p99 {p99:7.3f} ms")
+
+if __name__ == "__main__":
+    main()
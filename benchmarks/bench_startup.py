@@ -0,0 +1,73 @@
+"""Benchmark application start-up
+
+Usage: python benchmarks/bench_startup.py [runs]
+
+Each measurement runs in a fresh interpreter so module caches from earlier
+runs do not hide import costs. Reports the time to import the extractor and
+speech modules, and the time from process start until each main window has
+been shown and the event loop has processed its first events. Uses Qt's
+offscreen platform when no display is available.
+"""
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+IMPORT_SNIPPET = """
+import time
+start = time.perf_counter()
+import {module}
+print(f"elapsed {{time.perf_counter() - start}}")
+"""
+
+WINDOW_SNIPPET = """
+import time
+start = time.perf_counter()
+import sys
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import QTimer
+app = QApplication(sys.argv)
+from {module} import {window_class}
+window = {window_class}()
+window.show()
+def done():
+    print(f"elapsed {{time.perf_counter() - start}}")
+    app.quit()
+QTimer.singleShot(0, done)
+app.exec_()
+"""
+
+def run_snippet(code):
+    env = dict(os.environ)
+    if sys.platform.startswith('linux') and not env.get('DISPLAY'):
+        env.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True)
+    # The app may print its own messages (e.g. a missing speech engine)
+    match = re.search(r'elapsed ([0-9.]+)', result.stdout)
+    if match:
+        return float(match.group(1))
+    raise RuntimeError(f"No timing in output:\n{result.stdout}{result.stderr}")
+
+def measure(name, code, runs):
+    times = [run_snippet(code) for _ in range(runs)]
+    print(f"{name:<32} median {statistics.median(times) * 1000:8.1f} ms   "
+          f"min {min(times) * 1000:8.1f} ms")
+    return times
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    
+    for module in ('utils.text_extractor', 'utils.tts_engine', 'gui.main_window'):
+        measure(f"import {module}", IMPORT_SNIPPET.format(module=module), runs)
+    
+    measure("time to window (MainWindow)",
+            WINDOW_SNIPPET.format(module='gui.main_window', window_class='MainWindow'), runs)
+    measure("time to window (ReadAloudApp)",
+            WINDOW_SNIPPET.format(module='main', window_class='ReadAloudApp'), runs)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""Benchmark suite: extraction per format and speech control latency
+
+Usage: python benchmarks/bench_suite.py [--scale N] [--formats pdf,docx,...]
+                                        [--rounds N] [--output results.json]
+
+Generates synthetic PDF, DOCX, EPUB, TXT and image documents (their size
+grows with --scale) and reports, per format, the time to the first chunk,
+the total extraction time, throughput and peak Python memory. Then drives a
+TTSEngine on a stub pyttsx3 driver that speaks without audio and reports how
+long play, pause, seek and stop take to reach the driver. Results are
+written as JSON, so runs on different machines or commits can be compared.
+"""
+import argparse
+import datetime
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from benchmarks import fixtures, stub_driver
+from utils.text_extractor import TextExtractor
+
+# Generator and file name for each format; sizes are multiplied by --scale
+FORMATS = {
+    'pdf': ('bench.pdf', lambda path, scale: fixtures.make_pdf(path, max(1, int(200 * scale)))),
+    'docx': ('bench.docx', lambda path, scale: fixtures.make_docx(path, max(1, int(2000 * scale)))),
+    'epub': ('bench.epub', lambda path, scale: fixtures.make_epub(path, max(1, int(50 * scale)), 100)),
+    'txt': ('bench.txt', lambda path, scale: fixtures.make_txt(path, max(1, int(20000 * scale)))),
+    'image': ('bench.png', lambda path, scale: fixtures.make_image(path, max(1, int(20 * scale)))),
+}
+
+# The stub driver speaks this much faster than real time, so the suite
+# finishes quickly while utterances still last long enough to interrupt
+TTS_TIME_SCALE = 0.05
+# How long to wait for the driver to see a command before giving up (seconds)
+TTS_TIMEOUT = 5.0
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def measure_extraction(path):
+    """Time to first chunk, total time and peak memory of one extraction"""
+    # Serial PDF extraction, so the figures do not depend on the core count
+    extractor = TextExtractor(pdf_workers=1)
+    start = time.perf_counter()
+    first = None
+    chunks = 0
+    characters = 0
+    for chunk in extractor.iter_chunks(path):
+        if first is None:
+            first = time.perf_counter() - start
+        chunks += 1
+        characters += len(chunk.text)
+    elapsed = time.perf_counter() - start
+    
+    # Memory is traced on a second pass; tracing slows the parsers down a lot
+    tracemalloc.start()
+    for _ in TextExtractor(pdf_workers=1).iter_chunks(path):
+        pass
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    
+    size = os.path.getsize(path)
+    return {
+        'file_bytes': size,
+        'chunks': chunks,
+        'characters': characters,
+        'first_chunk_ms': round((first or elapsed) * 1000, 2),
+        'total_s': round(elapsed, 4),
+        'mb_per_s': round(size / 1e6 / elapsed, 2) if elapsed else None,
+        'chars_per_s': round(characters / elapsed) if elapsed else None,
+        'peak_memory_mb': round(peak / 1e6, 2),
+    }
+
+def bench_extraction(formats, scale, tmp):
+    results = {}
+    for name in formats:
+        file_name, make = FORMATS[name]
+        path = os.path.join(tmp, file_name)
+        try:
+            make(path, scale)
+            results[name] = measure_extraction(path)
+        except Exception as e:
+            # OCR needs the Tesseract executable, which may not be installed
+            results[name] = {'error': str(e)}
+        print(f"{name:6} {results[name]}", file=sys.stderr)
+    return results
+
+def wait_for_events(kinds, since):
+    """perf_counter time at which the driver has seen kinds, in order, after EVENTS[since]"""
+    deadline = time.perf_counter() + TTS_TIMEOUT
+    while time.perf_counter() < deadline:
+        remaining = list(kinds)
+        for when, event, _ in stub_driver.EVENTS[since:]:
+            if event == remaining[0]:
+                remaining.pop(0)
+                if not remaining:
+                    return when
+        time.sleep(0.0005)
+    raise TimeoutError(f"driver did not receive {', '.join(kinds)} within {TTS_TIMEOUT}s")
+
+def timed(action, *kinds):
+    """Milliseconds from calling action until the driver has received kinds of events"""
+    since = len(stub_driver.EVENTS)
+    start = time.perf_counter()
+    action()
+    return (wait_for_events(kinds, since) - start) * 1000
+
+def summarize(samples):
+    samples = sorted(samples)
+    return {
+        'median_ms': round(statistics.median(samples), 3),
+        # Nearest rank: the smallest sample with 95% of them at or below it
+        'p95_ms': round(samples[math.ceil(0.95 * len(samples)) - 1], 3),
+        'max_ms': round(samples[-1], 3),
+        'samples': len(samples),
+    }
+
+def bench_tts(rounds):
+    from PyQt5.QtCore import QCoreApplication
+    from utils.tts_engine import TTSEngine
+    
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+    stub_driver.TIME_SCALE = TTS_TIME_SCALE
+    engine = TTSEngine(driver_name=stub_driver.install())
+    deadline = time.perf_counter() + TTS_TIMEOUT
+    while engine.engine is None:
+        if time.perf_counter() > deadline:
+            raise TimeoutError("speech engine did not start")
+        time.sleep(0.001)
+    
+    sentence = fixtures.LINE
+    text = sentence * 2000
+    engine.set_text(text)
+    latencies = {'play': [], 'pause': [], 'resume': [], 'seek': [], 'stop': []}
+    positions = random.Random(0)
+    for _ in range(rounds):
+        latencies['play'].append(timed(engine.play, 'say'))
+        time.sleep(0.02)
+        latencies['pause'].append(timed(engine.pause, 'stop'))
+        latencies['resume'].append(timed(engine.play, 'say'))
+        time.sleep(0.02)
+        target = positions.randrange(len(sentence), len(text) - len(sentence))
+        # A seek drops the queued sentences and starts speaking at the target
+        latencies['seek'].append(timed(lambda: engine.seek(target), 'stop', 'say'))
+        time.sleep(0.02)
+        latencies['stop'].append(timed(engine.stop, 'stop'))
+    engine.shutdown()
+    app.processEvents()
+    return {command: summarize(samples) for command, samples in latencies.items()}
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark extraction and speech control latency")
+    parser.add_argument('--scale', type=float, default=1.0, help="multiplies the size of every document")
+    parser.add_argument('--formats', default=",".join(FORMATS), help="comma-separated formats to extract")
+    parser.add_argument('--rounds', type=int, default=20, help="play/pause/seek/stop rounds; 0 skips the TTS test")
+    parser.add_argument('--output', help="write the JSON here instead of to stdout")
+    args = parser.parse_args()
+    
+    formats = [name.strip() for name in args.formats.split(",") if name.strip()]
+    unknown = [name for name in formats if name not in FORMATS]
+    if unknown:
+        parser.error(f"unknown formats: {', '.join(unknown)}")
+    
+    results = {
+        'meta': {
+            'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'scale': args.scale,
+        },
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        results['extraction'] = bench_extraction(formats, args.scale, tmp)
+    if args.rounds > 0:
+        results['tts'] = bench_tts(args.rounds)
+    
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(output + "\n")
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main()
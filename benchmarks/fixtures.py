@@ -0,0 +1,92 @@
+"""Synthetic documents for the benchmarks
+
+Every generator writes a file of the requested size to path. The text is
+the same short passage repeated, so throughput figures are comparable
+between formats.
+"""
+import zipfile
+
+LINE = "The quick brown fox jumps over the lazy dog while the reader keeps talking. "
+
+PARAGRAPH = "<p>The quick brown fox jumps over the <em>lazy</em> dog while the reader keeps talking.</p>\n"
+
+CONTAINER = """<?xml version="1.0"?>
+<container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">
+  <rootfiles><rootfile full-path="OEBPS/content.opf" media-type="application/oebps-package+xml"/></rootfiles>
+</container>"""
+
+def make_pdf(path, pages):
+    """A PDF of text-heavy pages"""
+    import fitz  # PyMuPDF
+    
+    doc = fitz.open()
+    for number in range(pages):
+        page = doc.new_page()
+        text = f"Page {number + 1}\n" + "\n".join(LINE for _ in range(60))
+        page.insert_textbox(page.rect + (36, 36, -36, -36), text, fontsize=8)
+    doc.save(path)
+    doc.close()
+
+def make_docx(path, paragraphs, tables=False):
+    """A Word document with a heading every 20 paragraphs
+    
+    With tables, each section ends with a 4 x 3 table, like a report.
+    """
+    from docx import Document
+    
+    doc = Document()
+    for number in range(paragraphs):
+        if number % 20 == 0:
+            if tables and number:
+                table = doc.add_table(rows=4, cols=3)
+                for row in range(4):
+                    for column in range(3):
+                        table.cell(row, column).text = f"Row {row + 1}, column {column + 1}"
+            doc.add_heading(f"Section {number // 20 + 1}", level=1)
+        doc.add_paragraph(LINE * 4)
+    doc.save(path)
+
+def make_epub(path, chapters, paragraphs):
+    """An EPUB 3 book with the given number of chapters and paragraphs per chapter"""
+    manifest = "".join(f'<item id="c{n}" href="c{n}.xhtml" media-type="application/xhtml+xml"/>'
+                       for n in range(chapters))
+    spine = "".join(f'<itemref idref="c{n}"/>' for n in range(chapters))
+    opf = f"""<?xml version="1.0" encoding="utf-8"?>
+<package xmlns="http://www.idpf.org/2007/opf" version="3.0" unique-identifier="id">
+  <metadata xmlns:dc="http://purl.org/dc/elements/1.1/">
+    <dc:identifier id="id">bench</dc:identifier><dc:title>Bench</dc:title><dc:language>en</dc:language>
+  </metadata>
+  <manifest>{manifest}</manifest>
+  <spine>{spine}</spine>
+</package>"""
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('mimetype', 'application/epub+zip', zipfile.ZIP_STORED)
+        archive.writestr('META-INF/container.xml', CONTAINER)
+        archive.writestr('OEBPS/content.opf', opf)
+        for n in range(chapters):
+            body = f"<h1>Chapter {n + 1}</h1>\n" + PARAGRAPH * paragraphs
+            archive.writestr(f'OEBPS/c{n}.xhtml',
+                             '<?xml version="1.0" encoding="utf-8"?>\n'
+                             '<html xmlns="http://www.w3.org/1999/xhtml"><head><title>x</title>'
+                             f'<style>p {{ margin: 0 }}</style></head><body>{body}</body></html>')
+
+def make_txt(path, paragraphs):
+    """A UTF-8 text file of blank-line separated, hard-wrapped paragraphs"""
+    with open(path, 'w', encoding='utf-8', newline='\n') as file:
+        for _ in range(paragraphs):
+            file.write((LINE.strip() + "\n") * 4 + "\n")
+
+def make_image(path, lines):
+    """A white PNG with black lines of text, for OCR"""
+    from PIL import Image, ImageDraw, ImageFont
+    
+    try:
+        font = ImageFont.load_default(size=24)
+    except TypeError:
+        # Pillow before 10.1 has a single fixed-size default font
+        font = ImageFont.load_default()
+    image = Image.new('L', (1600, 60 + 40 * lines), 255)
+    draw = ImageDraw.Draw(image)
+    for number in range(lines):
+        draw.text((40, 30 + 40 * number), LINE.strip(), fill=0, font=font)
+    image.save(path)
@@ -0,0 +1,125 @@
+"""pyttsx3 driver that pretends to speak, for headless benchmarks
+
+install() registers it with pyttsx3 and returns the driver name to pass to
+pyttsx3.init() (or TTSEngine(driver_name=...)). Utterances take as long as
+real speech would at the configured rate, scaled by TIME_SCALE, and send
+the usual started-word and finished-utterance notifications; save_to_file()
+writes silence of the same length. Every say(), save_to_file() and stop()
+the engine issues is recorded in EVENTS with its time.
+"""
+import sys
+import time
+import wave
+
+from pyttsx3.voice import Voice
+
+DRIVER_NAME = 'benchmark_stub'
+# Multiplies the simulated speaking time; below 1 runs faster than real time
+TIME_SCALE = 1.0
+# Sample rate of the files written by save_to_file()
+FRAME_RATE = 22050
+# (perf_counter time, 'say', 'save' or 'stop', utterance text or None)
+EVENTS = []
+
+def install():
+    """Make the driver importable by pyttsx3 and return its name"""
+    sys.modules[f'pyttsx3.drivers.{DRIVER_NAME}'] = sys.modules[__name__]
+    return DRIVER_NAME
+
+def buildDriver(proxy):
+    return StubDriver(proxy)
+
+class StubDriver:
+    def __init__(self, proxy):
+        self._proxy = proxy
+        self._looping = False
+        self._utterance = None  # (text, [(location, length), ...], start time)
+        self._next_word = 0
+        self._saving = False  # A file was written; finished-utterance is due
+        voices = [Voice('stub.voice1', 'Stub Voice', ['en-US'], 'female', 'adult')]
+        self._config = {'rate': 200, 'volume': 1.0, 'voice': voices[0].id, 'voices': voices}
+    
+    def destroy(self):
+        pass
+    
+    def _seconds_per_word(self):
+        return 60.0 / max(self._config['rate'], 1) * TIME_SCALE
+    
+    def say(self, text):
+        EVENTS.append((time.perf_counter(), 'say', text))
+        self._proxy.setBusy(True)
+        self._proxy.notify('started-utterance')
+        words = []
+        location = 0
+        for word in text.split():
+            location = text.index(word, location)
+            words.append((location, len(word)))
+            location += len(word)
+        self._utterance = (text, words, time.perf_counter())
+        self._next_word = 0
+        self._advance()
+    
+    def save_to_file(self, text, filename):
+        EVENTS.append((time.perf_counter(), 'save', text))
+        self._proxy.setBusy(True)
+        self._proxy.notify('started-utterance')
+        frames = int(len(text.split()) * self._seconds_per_word() * FRAME_RATE)
+        with wave.open(filename, 'wb') as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(FRAME_RATE)
+            wav.writeframes(b'\0\0' * frames)
+        # Like a real driver, report completion from the event loop
+        self._saving = True
+    
+    def stop(self):
+        EVENTS.append((time.perf_counter(), 'stop', None))
+        if self._utterance is not None:
+            self._utterance = None
+            self._proxy.notify('finished-utterance', completed=False)
+            self._proxy.setBusy(False)
+    
+    def _advance(self):
+        """Send the notifications that are due by now"""
+        if self._saving:
+            self._saving = False
+            self._proxy.notify('finished-utterance', completed=True)
+            self._proxy.setBusy(False)
+        if self._utterance is None:
+            return
+        _, words, started = self._utterance
+        elapsed = time.perf_counter() - started
+        per_word = self._seconds_per_word()
+        while self._next_word < len(words) and self._next_word * per_word <= elapsed:
+            location, length = words[self._next_word]
+            self._proxy.notify('started-word', location=location, length=length)
+            self._next_word += 1
+        if self._next_word >= len(words) and len(words) * per_word <= elapsed:
+            self._utterance = None
+            self._proxy.notify('finished-utterance', completed=True)
+            self._proxy.setBusy(False)
+    
+    def startLoop(self):
+        self._looping = True
+        if not self._saving:
+            self._proxy.setBusy(False)
+        while self._looping:
+            self._advance()
+            time.sleep(0.005)
+    
+    def endLoop(self):
+        self._looping = False
+    
+    def iterate(self):
+        self._proxy.setBusy(False)
+        while True:
+            self._advance()
+            yield
+    
+    def getProperty(self, name):
+        return self._config[name]
+    
+    def setProperty(self, name, value):
+        if name not in ('rate', 'volume', 'voice'):
+            raise KeyError(f"unknown property {name}")
+        self._config[name] = value
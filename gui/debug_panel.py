@@ -0,0 +1,124 @@
+import json
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QTableWidget,
+                             QTableWidgetItem, QHeaderView, QPlainTextEdit, QLabel,
+                             QFileDialog, QApplication)
+from PyQt5.QtCore import Qt, QTimer
+
+from utils.metrics import METRICS, SamplingProfiler
+
+class DebugPanel(QWidget):
+    """Live view of the extraction and speech metrics, with a profiler
+    
+    Refreshes from METRICS while it is shown. "Copy JSON" puts the current
+    numbers on the clipboard so they can be pasted into a bug report.
+    """
+    
+    REFRESH_MS = 1000
+    COLUMNS = ('Timer', 'Count', 'Mean ms', 'Max ms', 'Last ms', 'Total ms')
+    
+    def __init__(self, parent=None):
+        super().__init__(parent, Qt.Window)
+        self.setWindowTitle("ReadAloud - Debug")
+        self.resize(640, 520)
+        self.profiler = SamplingProfiler()
+        
+        layout = QVBoxLayout(self)
+        
+        self.timer_table = QTableWidget(0, len(self.COLUMNS))
+        self.timer_table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.timer_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.timer_table.verticalHeader().setVisible(False)
+        self.timer_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.gauge_label = QLabel()
+        self.gauge_label.setTextInteractionFlags(Qt.TextSelectableByMouse)
+        
+        button_layout = QHBoxLayout()
+        reset_button = QPushButton("Reset")
+        reset_button.clicked.connect(self.reset)
+        copy_button = QPushButton("Copy JSON")
+        copy_button.clicked.connect(self.copy_json)
+        self.profile_button = QPushButton("Start Profiler")
+        self.profile_button.clicked.connect(self.toggle_profiler)
+        self.save_profile_button = QPushButton("Save Profile...")
+        self.save_profile_button.setEnabled(False)
+        self.save_profile_button.clicked.connect(self.save_profile)
+        button_layout.addWidget(reset_button)
+        button_layout.addWidget(copy_button)
+        button_layout.addStretch(1)
+        button_layout.addWidget(self.profile_button)
+        button_layout.addWidget(self.save_profile_button)
+        
+        # Hottest functions of the last profiling run
+        self.profile_view = QPlainTextEdit()
+        self.profile_view.setReadOnly(True)
+        self.profile_view.setPlaceholderText("Start the profiler, reproduce the problem, then stop it")
+        
+        layout.addWidget(self.timer_table, 2)
+        layout.addWidget(self.gauge_label)
+        layout.addLayout(button_layout)
+        layout.addWidget(self.profile_view, 1)
+        
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(self.REFRESH_MS)
+        self.refresh_timer.timeout.connect(self.refresh)
+    
+    def showEvent(self, event):
+        self.refresh()
+        self.refresh_timer.start()
+        super().showEvent(event)
+    
+    def hideEvent(self, event):
+        self.refresh_timer.stop()
+        super().hideEvent(event)
+    
+    def refresh(self):
+        snapshot = METRICS.snapshot()
+        timers = snapshot['timers']
+        self.timer_table.setRowCount(len(timers))
+        for row, (name, stat) in enumerate(timers.items()):
+            values = (name, stat['count'], stat['mean_ms'], stat['max_ms'], stat['last_ms'], stat['total_ms'])
+            for column, value in enumerate(values):
+                item = QTableWidgetItem(str(value))
+                if column:
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.timer_table.setItem(row, column, item)
+        gauges = snapshot['gauges']
+        self.gauge_label.setText("  ".join(f"{name}: {value}" for name, value in gauges.items())
+                                 or "No gauges yet")
+    
+    def reset(self):
+        METRICS.reset()
+        self.refresh()
+    
+    def copy_json(self):
+        QApplication.clipboard().setText(json.dumps(METRICS.snapshot(), indent=2))
+    
+    def toggle_profiler(self):
+        if self.profiler.running:
+            self.profiler.stop()
+            self.profile_button.setText("Start Profiler")
+            self.save_profile_button.setEnabled(True)
+            self.show_profile()
+        else:
+            self.profiler = SamplingProfiler()
+            self.profiler.start()
+            self.profile_button.setText("Stop Profiler")
+            self.save_profile_button.setEnabled(False)
+            self.profile_view.setPlainText("Profiling...")
+    
+    def show_profile(self):
+        lines = [f"{self.profiler.samples} samples; self and inclusive share of samples", ""]
+        total = max(self.profiler.samples, 1)
+        for function, own, inclusive in self.profiler.top(30):
+            lines.append(f"{100 * own / total:6.1f}% {100 * inclusive / total:6.1f}%  {function}")
+        self.profile_view.setPlainText("\n".join(lines))
+    
+    def save_profile(self):
+        file_path, _ = QFileDialog.getSaveFileName(self, "Save Profile", "readaloud-profile.txt",
+                                                   "Collapsed stacks (*.txt)")
+        if file_path:
+            self.profiler.write_collapsed(file_path)
+    
+    def closeEvent(self, event):
+        self.profiler.stop()
+        super().closeEvent(event)
@@ -0,0 +1,152 @@
+import re
+from bisect import bisect_left
+
+from PyQt5.QtWidgets import QPlainTextEdit, QTextEdit
+from PyQt5.QtGui import QColor, QTextCursor
+
+# Characters outside the Basic Multilingual Plane take two UTF-16 code
+# units in a QTextDocument but one character in a Python string
+_NON_BMP = re.compile('[\U00010000-\U0010ffff]')
+
+class DocumentView(QPlainTextEdit):
+    """Read-only view that materializes extracted chunks as they are needed
+    
+    Chunks are kept in a list and only inserted into the text document once
+    the user scrolls (or jumps) close to them, so opening a large book lays
+    out a couple of screens of text instead of the whole thing. Methods
+    take offsets in the extracted text; the view counts UTF-16 code units,
+    so positions after an emoji or other non-BMP character are shifted.
+    """
+    
+    # Characters kept materialized beyond the bottom of the viewport
+    MATERIALIZE_AHEAD = 50000
+    SENTENCE_HIGHLIGHT = QColor(255, 245, 190)
+    WORD_HIGHLIGHT = QColor(255, 210, 80)
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setReadOnly(True)
+        self.setUndoRedoEnabled(False)
+        self._chunks = []
+        self._materialized = 0  # Number of chunks inserted into the document
+        self._materialized_chars = 0
+        self._wide = []  # Text offsets of the materialized non-BMP characters
+        self._wide_view = []  # The same characters as view positions
+        self.verticalScrollBar().valueChanged.connect(self._materialize_visible)
+    
+    def clear_document(self):
+        self.clear_highlight()
+        self.clear()
+        self._chunks = []
+        self._materialized = 0
+        self._materialized_chars = 0
+        self._wide = []
+        self._wide_view = []
+    
+    def chunk_count(self):
+        return len(self._chunks)
+    
+    def append_chunk(self, chunk):
+        """Add an extracted chunk; it is shown once it scrolls into range"""
+        self._chunks.append(chunk)
+        self._materialize_visible()
+    
+    def _to_view(self, offset):
+        """View position of a text offset"""
+        return offset + bisect_left(self._wide, offset)
+    
+    def _to_text(self, position):
+        """Text offset of a view position"""
+        return position - bisect_left(self._wide_view, position)
+    
+    def _visible_end(self):
+        corner = self.viewport().rect().bottomRight()
+        return self._to_text(self.cursorForPosition(corner).position())
+    
+    def _end_position(self, offset):
+        # View position of offset, kept inside the document
+        return min(self._to_view(offset), self.document().characterCount() - 1)
+    
+    def _materialize_visible(self, *args):
+        self.materialize_to(self._visible_end() + self.MATERIALIZE_AHEAD)
+    
+    def materialize_to(self, position):
+        """Make sure the document holds every chunk starting before position"""
+        if self._materialized >= len(self._chunks) or self._materialized_chars >= position:
+            return
+        
+        scroll_bar = self.verticalScrollBar()
+        scroll_value = scroll_bar.value()
+        cursor = QTextCursor(self.document())
+        cursor.movePosition(QTextCursor.End)
+        cursor.beginEditBlock()
+        while self._materialized < len(self._chunks) and self._materialized_chars < position:
+            chunk = self._chunks[self._materialized]
+            cursor.insertText(chunk.text)
+            for match in _NON_BMP.finditer(chunk.text):
+                self._wide_view.append(chunk.offset + match.start() + len(self._wide))
+                self._wide.append(chunk.offset + match.start())
+            self._materialized += 1
+            self._materialized_chars = chunk.end
+        cursor.endEditBlock()
+        scroll_bar.setValue(scroll_value)
+    
+    def show_position(self, position):
+        """Scroll so the given character offset is at the top of the view"""
+        self.materialize_to(position + self.MATERIALIZE_AHEAD)
+        position = self._end_position(position)
+        
+        # Jumping to the end first makes ensureCursorVisible scroll the target
+        # line to the top rather than the bottom of the viewport
+        self.moveCursor(QTextCursor.End)
+        cursor = self.textCursor()
+        cursor.setPosition(position)
+        self.setTextCursor(cursor)
+        self.ensureCursorVisible()
+    
+    def show_match(self, start, end):
+        """Scroll to a span and select it, as for a search result"""
+        self.show_position(start)
+        cursor = self.textCursor()
+        cursor.setPosition(self._end_position(end), QTextCursor.KeepAnchor)
+        self.setTextCursor(cursor)
+    
+    def show_chunk(self, index):
+        """Jump to the start of a page, paragraph or chapter (0-based)"""
+        if 0 <= index < len(self._chunks):
+            self.show_position(self._chunks[index].offset)
+    
+    def _selection(self, start, end, color):
+        selection = QTextEdit.ExtraSelection()
+        selection.format.setBackground(color)
+        cursor = QTextCursor(self.document())
+        cursor.setPosition(start)
+        cursor.setPosition(end, QTextCursor.KeepAnchor)
+        selection.cursor = cursor
+        return selection
+    
+    def highlight(self, sentence=None, word=None, follow=True):
+        """Highlight the (start, end) spans of the sentence and word being read
+        
+        With follow set, the view scrolls when the word leaves the screen.
+        """
+        selections = []
+        for span, color in ((sentence, self.SENTENCE_HIGHLIGHT), (word, self.WORD_HIGHLIGHT)):
+            if span is None:
+                continue
+            self.materialize_to(span[1] + self.MATERIALIZE_AHEAD)
+            start = self._to_view(span[0])
+            end = self._end_position(span[1])
+            if start < end:
+                selections.append(self._selection(start, end, color))
+        self.setExtraSelections(selections)
+        
+        target = word or sentence
+        if follow and target is not None:
+            start = self._to_view(target[0])
+            cursor_rect = self.cursorRect(self._selection(start, start, self.WORD_HIGHLIGHT).cursor)
+            if not self.viewport().rect().contains(cursor_rect):
+                self.show_position(target[0])
+    
+    def clear_highlight(self):
+        self.setExtraSelections([])
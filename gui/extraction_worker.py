@@ -0,0 +1,67 @@
+import threading
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from utils.metrics import METRICS
+
+class ExtractionWorker(QThread):
+    """Runs TextExtractor.iter_chunks off the GUI thread
+    
+    With a SearchIndex, each chunk is indexed after it has been handed to
+    the GUI, so searching never holds up the first words being read. The
+    first `skip` chunks are only indexed, not emitted; they are the ones a
+    DocumentPrefetch already delivered. With index_max_chars the index is
+    dropped at the first chunk (after the first) ending beyond that offset,
+    so its size stays bounded, until keep_index() lifts the limit.
+    """
+    
+    chunk_ready = pyqtSignal(object)  # TextChunk
+    progress = pyqtSignal(int, int)  # chunks done, total (0 if unknown)
+    failed = pyqtSignal(str)
+    
+    def __init__(self, text_extractor, file_path, parent=None, search_index=None, skip=0,
+                 index_max_chars=None):
+        super().__init__(parent)
+        self.text_extractor = text_extractor
+        self.file_path = file_path
+        self.search_index = search_index
+        self.skip = skip
+        self.index_max_chars = index_max_chars
+        self._index_lock = threading.Lock()
+        self._cancelled = False
+    
+    def keep_index(self):
+        """Index the rest of the document; returns False if the index was already dropped"""
+        with self._index_lock:
+            self.index_max_chars = None
+            return self.search_index is not None
+    
+    def cancel(self):
+        """Stop after the chunk currently being parsed"""
+        self._cancelled = True
+    
+    def is_cancelled(self):
+        return self._cancelled
+    
+    def run(self):
+        try:
+            total = self.text_extractor.count_chunks(self.file_path) or 0
+            self.progress.emit(0, total)
+            
+            for done, chunk in enumerate(self.text_extractor.iter_chunks(self.file_path), 1):
+                if self._cancelled:
+                    return
+                if done > self.skip:
+                    self.chunk_ready.emit(chunk)
+                    self.progress.emit(done, total)
+                with self._index_lock:
+                    if (self.index_max_chars is not None and chunk.index > 0
+                            and chunk.end > self.index_max_chars):
+                        self.search_index = None
+                    search_index = self.search_index
+                if search_index is not None:
+                    with METRICS.timer('search.index'):
+                        search_index.add_chunk(chunk.text, chunk.offset)
+        except Exception as e:
+            if not self._cancelled:
+                self.failed.emit(str(e))
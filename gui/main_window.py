@@ -1,27 +1,60 @@
 import os
+import time
 from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
-                             QPushButton, QTextEdit, QFileDialog, QSlider, 
-                             QLabel, QMessageBox, QProgressBar)
-from PyQt5.QtCore import Qt, QThread, pyqtSignal
+                             QPushButton, QFileDialog, QSlider, QSpinBox, QComboBox,
+                             QLabel, QMessageBox, QProgressBar, QAction, QLineEdit,
+                             QListWidget, QListWidgetItem, QDockWidget)
+from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtGui import QIcon, QFont
 
+from gui.debug_panel import DebugPanel
+from gui.document_view import DocumentView
+from gui.extraction_worker import ExtractionWorker
+from gui.prefetch import DocumentPrefetch
+from gui.queue_panel import QueuePanel
+from utils.cache import ExtractionCache
+from utils.formats import file_dialog_filter
+from utils.reading_queue import ReadingQueue
+from utils.search_index import SearchIndex
 from utils.text_extractor import TextExtractor
 from utils.tts_engine import TTSEngine
 
 class MainWindow(QMainWindow):
+    # Search results listed at most; more are rarely useful in a list
+    SEARCH_RESULT_LIMIT = 200
+    # Characters of the next queued document held in memory ahead of time;
+    # beyond this the prefetch only fills the extraction cache on disk
+    PREFETCH_MAX_CHARS = 4 * 1024 * 1024
+    
     def __init__(self):
         super().__init__()
         
         self.setWindowTitle("ReadAloud - Text to Speech Reader")
         self.setMinimumSize(800, 600)
         
-        self.text_extractor = TextExtractor()
+        self.text_extractor = TextExtractor(cache=ExtractionCache())
         self.tts_engine = TTSEngine()
+        self.tts_engine.position_changed.connect(self.on_playback_position)
+        self.tts_engine.status_changed.connect(self.on_playback_status)
+        self.tts_engine.voices_ready.connect(self.on_voices_ready)
         self.current_file = None
         self.extracted_text = ""
+        self.extraction_worker = None
+        self._text_parts = []
+        self.search_index = SearchIndex()
+        self.debug_panel = None
         
-        self.init_ui()
+        # Documents to read in order; the next one is extracted while the
+        # current one is read, so moving on to it is instant
+        self.reading_queue = ReadingQueue()
+        self.prefetch = None
+        self._resume_position = 0  # Saved position to seek to once its text has arrived
+        self._play_when_ready = False
         
+        self.init_ui()
+        # Reopen the document that was being read when the app was closed
+        QTimer.singleShot(0, self.restore_queue)
+    
     def init_ui(self):
         # Main widget and layout
         main_widget = QWidget()
@@ -33,11 +66,41 @@ class MainWindow(QMainWindow):
         file_button.setMinimumHeight(40)
         file_button.clicked.connect(self.open_file_dialog)
         
-        # Text display area
-        self.text_display = QTextEdit()
-        self.text_display.setReadOnly(True)
+        # Text display area; pages are laid out only when scrolled to
+        self.text_display = DocumentView()
         self.text_display.setFont(QFont("Arial", 11))
         
+        # Page navigation
+        page_layout = QHBoxLayout()
+        self.page_label = QLabel("Page:")
+        self.page_spin = QSpinBox()
+        self.page_spin.setMinimum(1)
+        self.page_spin.setMaximum(1)
+        self.page_spin.setKeyboardTracking(False)
+        self.page_spin.valueChanged.connect(self.go_to_page)
+        self.page_count_label = QLabel("of 0")
+        page_layout.addStretch(1)
+        page_layout.addWidget(self.page_label)
+        page_layout.addWidget(self.page_spin)
+        page_layout.addWidget(self.page_count_label)
+        
+        # Full-text search; results are listed below the box
+        search_layout = QHBoxLayout()
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("Search the document")
+        self.search_edit.setClearButtonEnabled(True)
+        self.search_edit.textChanged.connect(self.search)
+        self.read_here_button = QPushButton("Read from Here")
+        self.read_here_button.setEnabled(False)
+        self.read_here_button.clicked.connect(self.read_from_search_hit)
+        search_layout.addWidget(self.search_edit, 1)
+        search_layout.addWidget(self.read_here_button)
+        self.search_results = QListWidget()
+        self.search_results.setMaximumHeight(120)
+        self.search_results.setVisible(False)
+        self.search_results.currentItemChanged.connect(self.show_search_hit)
+        self.search_results.itemActivated.connect(self.read_from_search_hit)
+        
         # Control buttons layout
         control_layout = QHBoxLayout()
         
@@ -84,6 +147,16 @@ class MainWindow(QMainWindow):
         speed_layout.addWidget(self.speed_slider)
         speed_layout.addWidget(self.speed_value_label)
         
+        # Voice selection, filled in once the speech engine has started
+        voice_layout = QHBoxLayout()
+        voice_label = QLabel("Voice:")
+        self.voice_combo = QComboBox()
+        self.voice_combo.setEnabled(False)
+        self.voice_combo.currentIndexChanged.connect(self.change_voice)
+        
+        voice_layout.addWidget(voice_label)
+        voice_layout.addWidget(self.voice_combo, 1)
+        
         # Volume control
         volume_layout = QHBoxLayout()
         volume_label = QLabel("Volume:")
@@ -109,16 +182,39 @@ class MainWindow(QMainWindow):
         # Add all components to main layout
         main_layout.addWidget(file_button)
         main_layout.addWidget(self.text_display)
+        main_layout.addLayout(page_layout)
+        main_layout.addLayout(search_layout)
+        main_layout.addWidget(self.search_results)
         main_layout.addLayout(control_layout)
+        main_layout.addLayout(voice_layout)
         main_layout.addLayout(speed_layout)
         main_layout.addLayout(volume_layout)
         main_layout.addWidget(self.status_bar)
         
         self.setCentralWidget(main_widget)
         
+        # Reading queue, docked beside the text
+        self.queue_panel = QueuePanel(self.reading_queue)
+        self.queue_panel.document_activated.connect(self.open_queue_entry)
+        self.queue_panel.queue_changed.connect(self.on_queue_changed)
+        self.queue_dock = QDockWidget("Reading Queue", self)
+        self.queue_dock.setObjectName("reading_queue")
+        self.queue_dock.setWidget(self.queue_panel)
+        self.addDockWidget(Qt.RightDockWidgetArea, self.queue_dock)
+        
+        # Metrics and profiler window for diagnosing slow loading or speech
+        tools_menu = self.menuBar().addMenu("Tools")
+        debug_action = QAction("Debug Panel", self)
+        debug_action.setShortcut("Ctrl+Shift+D")
+        debug_action.triggered.connect(self.show_debug_panel)
+        tools_menu.addAction(debug_action)
+        queue_action = self.queue_dock.toggleViewAction()
+        queue_action.setShortcut("Ctrl+Shift+Q")
+        tools_menu.addAction(queue_action)
+        
         # Disable buttons initially
         self.toggle_controls(False)
-        
+    
     def toggle_controls(self, enable=True):
         self.play_button.setEnabled(enable)
         self.pause_button.setEnabled(enable)
@@ -129,35 +225,285 @@ class MainWindow(QMainWindow):
         self.volume_slider.setEnabled(enable)
     
     def open_file_dialog(self):
-        file_filter = "Documents (*.pdf *.docx *.txt *.epub *.png *.jpg *.jpeg)"
+        file_filter = file_dialog_filter()
         file_path, _ = QFileDialog.getOpenFileName(self, "Select Document", "", file_filter)
         
         if file_path:
-            self.current_file = file_path
-            self.process_file(file_path)
+            # Opened documents go into the queue right after the current one
+            index = self.reading_queue.add(file_path, self.reading_queue.current + 1)
+            self.open_queue_entry(index)
+    
+    def restore_queue(self):
+        if self.current_file is not None:
+            # A document was opened before the event loop got here
+            return
+        path = self.reading_queue.current_path()
+        if path is not None and os.path.exists(path):
+            self.open_queue_entry(self.reading_queue.current)
+        else:
+            self._update_prefetch()
+    
+    def open_queue_entry(self, index, play=False):
+        """Open a document of the reading queue, continuing where it was left"""
+        self.reading_queue.current = index
+        self.reading_queue.save()
+        self.queue_panel.refresh(index)
+        self.current_file = self.reading_queue.current_path()
+        self.process_file(self.current_file)
+        self._play_when_ready = play
+        if play:
+            self._play_if_ready()
+    
+    def on_queue_changed(self):
+        self.reading_queue.save()
+        self._update_prefetch()
     
     def process_file(self, file_path):
-        try:
-            self.status_bar.setValue(10)
-            self.extracted_text = self.text_extractor.extract_text(file_path)
-            self.status_bar.setValue(100)
-            
-            if self.extracted_text:
-                self.text_display.setText(self.extracted_text)
-                self.toggle_controls(True)
-                self.tts_engine.set_text(self.extracted_text)
-            else:
-                QMessageBox.warning(self, "Extraction Error", 
-                                  "Could not extract text from the selected file.")
-                self.toggle_controls(False)
-        
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"An error occurred: {str(e)}")
+        self.cancel_extraction()
+        self._play_when_ready = False
+        
+        self.extracted_text = ""
+        self._text_parts = []
+        self.text_display.clear_document()
+        self.page_spin.setMaximum(1)
+        self.page_count_label.setText("of 0")
+        self.tts_engine.set_text("")
+        self.toggle_controls(False)
+        self.status_bar.setMaximum(100)
+        self.status_bar.setValue(0)
+        self.search_results.clear()
+        self.search_results.setVisible(False)
+        self._resume_position = self.reading_queue.position(file_path)
+        
+        prefetch = self.prefetch
+        self.prefetch = None
+        if prefetch is not None and (prefetch.file_path != os.path.abspath(file_path) or prefetch.error):
+            prefetch.cancel()
+            prefetch = None
+        
+        if prefetch is None:
+            self._start_extraction(file_path)
+            return
+        
+        # The document was extracted ahead of time: show what is held at once
+        chunks = prefetch.release()
+        if prefetch.truncated:
+            # Only the first chunks were kept; the rest comes from a new worker,
+            # out of the extraction cache once the prefetch got to the end
+            prefetch.cancel()
+            for chunk in chunks:
+                self._show_chunk(chunk)
+            self._start_extraction(file_path, skip=len(chunks))
+            return
+        
+        self.search_index = prefetch.search_index
+        self.extraction_worker = prefetch
+        for chunk in chunks:
+            self._show_chunk(chunk)
+        if prefetch.done:
+            self.extraction_worker = None
+            prefetch.deleteLater()
+            self._extraction_finished()
+        else:
+            self._connect_extraction(prefetch)
+            self.on_extraction_progress(*prefetch.last_progress)
+    
+    def _start_extraction(self, file_path, skip=0):
+        # A fresh index per document; a cancelled worker keeps filling the old one
+        self.search_index = SearchIndex()
+        worker = ExtractionWorker(self.text_extractor, file_path, self, self.search_index, skip)
+        self._connect_extraction(worker)
+        self.extraction_worker = worker
+        worker.start()
+    
+    def _connect_extraction(self, worker):
+        # An ExtractionWorker or an unfinished DocumentPrefetch
+        worker.chunk_ready.connect(self.on_chunk_ready)
+        worker.progress.connect(self.on_extraction_progress)
+        worker.failed.connect(self.on_extraction_failed)
+        worker.finished.connect(self.on_extraction_finished)
+    
+    def _update_prefetch(self):
+        """Extract the next queued document once the current one is loaded"""
+        next_path = self.reading_queue.next_path()
+        if self.prefetch is not None and self.prefetch.file_path != next_path:
+            self.prefetch.cancel()
+            self.prefetch = None
+        if (self.prefetch is None and next_path is not None and self.extraction_worker is None
+                and os.path.exists(next_path)):
+            self.prefetch = DocumentPrefetch(self.text_extractor, next_path, self.PREFETCH_MAX_CHARS, self)
+            self.prefetch.first_chunk_ready.connect(self.on_prefetch_first_chunk)
+    
+    def on_prefetch_first_chunk(self, chunk):
+        if self.sender() is self.prefetch:
+            self.tts_engine.prefetch(chunk.text)
+    
+    def cancel_extraction(self):
+        """Cancel the running extraction, if any; its late signals are ignored"""
+        if self.extraction_worker is not None:
+            self.extraction_worker.cancel()
+            self.extraction_worker = None
+    
+    def _is_current_worker(self):
+        worker = self.sender()
+        return worker is not None and worker is self.extraction_worker
+    
+    def on_chunk_ready(self, chunk):
+        if not self._is_current_worker() or self.extraction_worker.is_cancelled():
+            return
+        self._show_chunk(chunk)
+    
+    def _show_chunk(self, chunk):
+        self._text_parts.append(chunk.text)
+        
+        self.text_display.append_chunk(chunk)
+        self.page_spin.setMaximum(self.text_display.chunk_count())
+        self.page_count_label.setText(f"of {self.text_display.chunk_count()}")
+        self.tts_engine.append_text(chunk.text, chunk.kind in ('page', 'chapter'))
+        
+        if chunk.index == 0:
+            self.toggle_controls(True)
+        if self._resume_position and chunk.end > self._resume_position:
+            self.tts_engine.seek(self._resume_position)
+            self.text_display.show_position(self._resume_position)
+            self.statusBar().showMessage("Continuing where you left off")
+            self._resume_position = 0
+        self._play_if_ready()
+    
+    def _play_if_ready(self):
+        """Start a document opened from the queue once its first words are in"""
+        if self._play_when_ready and self._text_parts and not self._resume_position:
+            self._play_when_ready = False
+            self.tts_engine.play()
+    
+    def on_extraction_progress(self, done, total):
+        if not self._is_current_worker():
+            return
+        
+        if total:
+            self.status_bar.setMaximum(total)
+            self.status_bar.setValue(done)
+        else:
+            # Unknown length: show a busy indicator until extraction finishes
+            self.status_bar.setMaximum(0)
+    
+    def on_extraction_failed(self, message):
+        if not self._is_current_worker():
+            return
+        
+        # Detach the worker so on_extraction_finished does not warn twice
+        self.extraction_worker = None
+        self.extracted_text = "".join(self._text_parts)
+        self.tts_engine.finish_text()
+        self._resume_position = 0
+        self._play_if_ready()
+        QMessageBox.critical(self, "Error", f"An error occurred: {message}")
+        self.status_bar.setMaximum(100)
+        self.status_bar.setValue(0)
+        self.toggle_controls(bool(self._text_parts))
+        self._update_prefetch()
+    
+    def on_extraction_finished(self):
+        worker = self.sender()
+        if worker is not None:
+            worker.deleteLater()
+        if worker is not self.extraction_worker:
+            return
+        
+        self.extraction_worker = None
+        self._extraction_finished()
+    
+    def _extraction_finished(self):
+        self.extracted_text = "".join(self._text_parts)
+        self.tts_engine.finish_text()
+        # A saved position past the end of a changed document is dropped
+        self._resume_position = 0
+        self._play_if_ready()
+        self.status_bar.setMaximum(100)
+        self.status_bar.setValue(100)
+        if not self._text_parts:
+            QMessageBox.warning(self, "Extraction Error", 
+                              "Could not extract text from the selected file.")
             self.status_bar.setValue(0)
             self.toggle_controls(False)
+        self._update_prefetch()
+    
+    def search(self, query):
+        """List the matches of query in the text indexed so far"""
+        self.search_results.clear()
+        started = time.perf_counter()
+        hits = self.search_index.search(query, self.SEARCH_RESULT_LIMIT) if query.strip() else []
+        elapsed = time.perf_counter() - started
+        text = self.tts_engine.text
+        # The worker indexes a chunk before the GUI has received it
+        hits = [hit for hit in hits if hit.end <= len(text)]
+        for hit in hits:
+            before = text[max(0, hit.offset - 40):hit.offset]
+            after = text[hit.end:hit.end + 60]
+            snippet = " ".join(f"…{before}[{text[hit.offset:hit.end]}]{after}…".split())
+            item = QListWidgetItem(f"{hit.chunk_index + 1}: {snippet}")
+            item.setData(Qt.UserRole, (hit.offset, hit.end))
+            self.search_results.addItem(item)
+        self.search_results.setVisible(bool(query.strip()))
+        if query.strip() and not hits:
+            self.search_results.addItem("No matches")
+        if query.strip():
+            more = "+" if len(hits) >= self.SEARCH_RESULT_LIMIT else ""
+            self.statusBar().showMessage(f"{len(hits)}{more} matches in {elapsed * 1000:.1f} ms")
+        self.read_here_button.setEnabled(False)
+    
+    def show_search_hit(self, item, previous=None):
+        span = item.data(Qt.UserRole) if item is not None else None
+        self.read_here_button.setEnabled(span is not None)
+        if span is not None:
+            self.text_display.show_match(*span)
+    
+    def read_from_search_hit(self, *args):
+        """Start reading at the selected search result"""
+        item = self.search_results.currentItem()
+        span = item.data(Qt.UserRole) if item is not None else None
+        if span is None or not self._text_parts:
+            return
+        self.tts_engine.seek(span[0])
+        self.tts_engine.play()
+    
+    def go_to_page(self, page):
+        self.text_display.show_chunk(page - 1)
+    
+    def on_playback_position(self, position, length):
+        """Highlight the word being spoken and move the progress bar"""
+        word = (position, position + length) if length else None
+        sentence = self.tts_engine.sentence_bounds(position)
+        self.text_display.highlight(sentence, word)
+        if self.current_file and not self.tts_engine.is_stopped:
+            self.reading_queue.set_position(self.current_file, position)
+        
+        # The bar shows extraction progress until the document is fully loaded
+        total = len(self.extracted_text)
+        if self.extraction_worker is None and total:
+            self.status_bar.setMaximum(1000)
+            self.status_bar.setValue(int(position * 1000 / total))
+    
+    def on_playback_status(self, status):
+        self.statusBar().showMessage(status.capitalize())
+        # The engine only finishes once finish_text() has been called, but a
+        # document still being extracted is never left for the next one
+        if status == 'finished' and self.current_file and self.extraction_worker is None:
+            # Done with this document: forget its position and go on to the next
+            self.reading_queue.set_position(self.current_file, 0)
+            if self.reading_queue.next_path() is not None and self.reading_queue.current >= 0:
+                self.open_queue_entry(self.reading_queue.current + 1, play=True)
+                return
+        if status != 'playing':
+            self.reading_queue.save()
+        if status in ('stopped', 'finished'):
+            self.text_display.clear_highlight()
+            if self.extraction_worker is None and self.extracted_text:
+                self.status_bar.setMaximum(1000)
+                self.status_bar.setValue(1000 if status == 'finished' else 0)
     
     def play(self):
-        if self.extracted_text:
+        if self._text_parts:
             self.tts_engine.play()
     
     def pause(self):
@@ -177,11 +523,40 @@ class MainWindow(QMainWindow):
         self.speed_value_label.setText(f"{speed:.1f}x")
         self.tts_engine.set_rate(speed)
     
+    def on_voices_ready(self, voices):
+        self.voice_combo.blockSignals(True)
+        self.voice_combo.clear()
+        for name, voice_id in voices:
+            self.voice_combo.addItem(name, voice_id)
+        self.voice_combo.blockSignals(False)
+        self.voice_combo.setEnabled(bool(voices))
+    
+    def change_voice(self, index):
+        voice_id = self.voice_combo.itemData(index)
+        if voice_id is not None:
+            self.tts_engine.set_voice(voice_id)
+    
     def change_volume(self):
         volume = self.volume_slider.value()
         self.volume_value_label.setText(f"{volume}%")
         self.tts_engine.set_volume(volume / 100)
     
+    def show_debug_panel(self):
+        if self.debug_panel is None:
+            self.debug_panel = DebugPanel(self)
+        self.debug_panel.show()
+        self.debug_panel.raise_()
+    
     def closeEvent(self, event):
+        if self.debug_panel is not None:
+            self.debug_panel.close()
+        self.reading_queue.save()
+        self.cancel_extraction()
+        if self.prefetch is not None:
+            self.prefetch.cancel()
+        for worker in self.findChildren(ExtractionWorker):
+            worker.cancel()
+            worker.wait()
         self.tts_engine.stop()
+        self.tts_engine.shutdown()
         event.accept()
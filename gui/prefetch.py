@@ -0,0 +1,101 @@
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from gui.extraction_worker import ExtractionWorker
+from utils.search_index import SearchIndex
+
+class DocumentPrefetch(QObject):
+    """Extracts a document before it is opened and holds on to its first chunks
+    
+    Chunks are kept until they add up to max_chars of text. Later ones are
+    dropped, but extraction runs to the end anyway so the whole text lands
+    in the extraction cache. Only the held chunks are indexed for search;
+    a truncated prefetch drops its index and the document is indexed again
+    when it is opened. release() hands the held chunks over and lets the
+    index grow past max_chars; after that the prefetch passes the worker's
+    signals on like an ExtractionWorker, so an unfinished extraction is
+    taken over rather than started again.
+    """
+    
+    chunk_ready = pyqtSignal(object)  # TextChunk, once released
+    progress = pyqtSignal(int, int)
+    failed = pyqtSignal(str)
+    finished = pyqtSignal()
+    first_chunk_ready = pyqtSignal(object)  # The first TextChunk, while still held
+    
+    def __init__(self, text_extractor, file_path, max_chars, parent=None):
+        super().__init__(parent)
+        self.file_path = file_path
+        self.max_chars = max_chars
+        self.chunks = []
+        self.chars = 0
+        self.truncated = False  # Chunks were dropped to stay within max_chars
+        self.error = None
+        self.done = False
+        self.released = False
+        self.last_progress = (0, 0)
+        self._cancelled = False
+        
+        self.search_index = SearchIndex()  # None once truncated
+        self.worker = ExtractionWorker(text_extractor, file_path, self, self.search_index,
+                                       index_max_chars=max_chars)
+        self.worker.chunk_ready.connect(self._on_chunk_ready)
+        self.worker.progress.connect(self._on_progress)
+        self.worker.failed.connect(self._on_failed)
+        self.worker.finished.connect(self._on_finished)
+        self.worker.start()
+    
+    def release(self):
+        """Return the held chunks and pass everything after them on through the signals"""
+        chunks = self.chunks
+        self.chunks = []
+        self.released = True
+        # The opened document is indexed to the end, unless the worker has
+        # already passed max_chars with chunks that have not arrived here yet
+        if not self.truncated and not self.worker.keep_index():
+            self.truncated = True
+            self.search_index = None
+        return chunks
+    
+    def cancel(self):
+        """Stop extracting; the prefetch deletes itself once its worker has stopped"""
+        self._cancelled = True
+        self.chunks = []
+        self.worker.cancel()
+        if self.done:
+            self.deleteLater()
+    
+    def is_cancelled(self):
+        return self._cancelled
+    
+    def _on_chunk_ready(self, chunk):
+        if self._cancelled:
+            return
+        if self.released:
+            self.chunk_ready.emit(chunk)
+            return
+        if self.truncated or (self.chunks and self.chars + len(chunk.text) > self.max_chars):
+            # The worker stops filling the index at the same chunk
+            self.truncated = True
+            self.search_index = None
+            return
+        self.chunks.append(chunk)
+        self.chars += len(chunk.text)
+        if chunk.index == 0:
+            self.first_chunk_ready.emit(chunk)
+    
+    def _on_progress(self, done, total):
+        self.last_progress = (done, total)
+        if self.released and not self._cancelled:
+            self.progress.emit(done, total)
+    
+    def _on_failed(self, message):
+        self.error = message
+        if self.released and not self._cancelled:
+            self.failed.emit(message)
+    
+    def _on_finished(self):
+        self.done = True
+        if self._cancelled:
+            self.deleteLater()
+        elif self.released:
+            self.finished.emit()
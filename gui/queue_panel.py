@@ -0,0 +1,95 @@
+import os
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QListWidget,
+                             QListWidgetItem, QFileDialog)
+from PyQt5.QtCore import pyqtSignal
+from PyQt5.QtGui import QFont
+
+from utils.formats import file_dialog_filter
+
+class QueuePanel(QWidget):
+    """Shows and edits a ReadingQueue; the window opens the documents
+    
+    Double-clicking a document asks for it to be opened. Every change to
+    the order or contents is announced through queue_changed so the window
+    can save the queue and prefetch whatever comes next.
+    """
+    
+    document_activated = pyqtSignal(int)  # Index of the document to open
+    queue_changed = pyqtSignal()
+    
+    def __init__(self, reading_queue, parent=None):
+        super().__init__(parent)
+        self.reading_queue = reading_queue
+        
+        layout = QVBoxLayout(self)
+        self.list_widget = QListWidget()
+        self.list_widget.itemActivated.connect(self._on_item_activated)
+        self.list_widget.currentRowChanged.connect(self._update_buttons)
+        
+        button_layout = QHBoxLayout()
+        add_button = QPushButton("Add...")
+        add_button.clicked.connect(self.add_documents)
+        self.remove_button = QPushButton("Remove")
+        self.remove_button.clicked.connect(self.remove_selected)
+        self.up_button = QPushButton("Up")
+        self.up_button.clicked.connect(lambda: self.move_selected(-1))
+        self.down_button = QPushButton("Down")
+        self.down_button.clicked.connect(lambda: self.move_selected(1))
+        button_layout.addWidget(add_button)
+        button_layout.addWidget(self.remove_button)
+        button_layout.addWidget(self.up_button)
+        button_layout.addWidget(self.down_button)
+        
+        layout.addWidget(self.list_widget)
+        layout.addLayout(button_layout)
+        self.refresh()
+    
+    def refresh(self, select=None):
+        """Rebuild the list from the queue, keeping or moving the selection"""
+        if select is None:
+            select = self.list_widget.currentRow()
+        self.list_widget.blockSignals(True)
+        self.list_widget.clear()
+        for index, path in enumerate(self.reading_queue.documents):
+            item = QListWidgetItem(os.path.basename(path))
+            item.setToolTip(path)
+            if index == self.reading_queue.current:
+                font = QFont(item.font())
+                font.setBold(True)
+                item.setFont(font)
+            if not os.path.exists(path):
+                item.setText(f"{item.text()} (missing)")
+            self.list_widget.addItem(item)
+        self.list_widget.setCurrentRow(min(select, self.list_widget.count() - 1))
+        self.list_widget.blockSignals(False)
+        self._update_buttons()
+    
+    def add_documents(self):
+        file_paths, _ = QFileDialog.getOpenFileNames(self, "Add Documents", "", file_dialog_filter())
+        if file_paths:
+            for file_path in file_paths:
+                index = self.reading_queue.add(file_path)
+            self.refresh(index)
+            self.queue_changed.emit()
+    
+    def remove_selected(self):
+        row = self.list_widget.currentRow()
+        if row >= 0:
+            self.reading_queue.remove(row)
+            self.refresh(row)
+            self.queue_changed.emit()
+    
+    def move_selected(self, offset):
+        row = self.list_widget.currentRow()
+        if row >= 0:
+            self.refresh(self.reading_queue.move(row, offset))
+            self.queue_changed.emit()
+    
+    def _update_buttons(self, *args):
+        row = self.list_widget.currentRow()
+        self.remove_button.setEnabled(row >= 0)
+        self.up_button.setEnabled(row > 0)
+        self.down_button.setEnabled(0 <= row < self.list_widget.count() - 1)
+    
+    def _on_item_activated(self, item):
+        self.document_activated.emit(self.list_widget.row(item))
@@ -1,26 +1,29 @@
 import os
 import sys
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QPushButton, QFileDialog, 
-                            QVBoxLayout, QHBoxLayout, QWidget, QLabel, QTextEdit,
+                            QVBoxLayout, QHBoxLayout, QWidget, QLabel,
                             QSlider, QComboBox)
-from PyQt5.QtCore import Qt
-import pyttsx3
-import fitz  # PyMuPDF
-from docx import Document
-from PIL import Image
-import pytesseract
-import ebooklib
-from ebooklib import epub
-from bs4 import BeautifulSoup
+from PyQt5.QtCore import Qt, QTimer
+
+from gui.document_view import DocumentView
+from gui.extraction_worker import ExtractionWorker
+
+# The speech engine and the document format libraries are imported when
+# first needed so the window can appear without waiting for them
 
 class ReadAloudApp(QMainWindow):
     def __init__(self):
         super().__init__()
+        self.engine = None
+        self.text_extractor = None
+        self.extraction_worker = None
         self.initUI()
-        self.init_tts_engine()
+        # Start the speech engine once the window is on screen
+        QTimer.singleShot(0, self.init_tts_engine)
         self.current_file = None
         self.text_content = ""
-        
+        self._text_parts = []
+    
     def initUI(self):
         self.setWindowTitle('ReadAloud - Document Reader')
         self.setGeometry(100, 100, 800, 600)
@@ -40,9 +43,8 @@ class ReadAloudApp(QMainWindow):
         browse_button.clicked.connect(self.open_file)
         file_layout.addWidget(browse_button)
         
-        # Text area
-        self.text_display = QTextEdit()
-        self.text_display.setReadOnly(True)
+        # Text area; pages are laid out only when scrolled to
+        self.text_display = DocumentView()
         
         # Voice controls
         voice_layout = QHBoxLayout()
@@ -87,28 +89,47 @@ class ReadAloudApp(QMainWindow):
         self.setCentralWidget(main_widget)
     
     def init_tts_engine(self):
-        self.engine = pyttsx3.init()
-        self.engine.setProperty('rate', 200)  # Default rate
-        
+        """Start the speech engine; it speaks on its own thread, so the controls stay responsive"""
+        try:
+            from utils.tts_engine import TTSEngine
+            self.engine = TTSEngine()
+        except Exception as e:
+            self.file_path_label.setText(f"Speech engine unavailable: {str(e)}")
+            return
+        self.engine.set_rate(self.rate_slider.value() / 100)
+        self.engine.voices_ready.connect(self.on_voices_ready)
+        self.engine.status_changed.connect(self.on_playback_status)
+        self.engine.position_changed.connect(self.on_playback_position)
+        # A document opened before the engine started is read from the start
+        if self._text_parts:
+            self.engine.set_text("".join(self._text_parts), self.extraction_worker is None)
+            self.play_button.setEnabled(True)
+    
+    def on_voices_ready(self, voices):
         # Populate voice selection
-        voices = self.engine.getProperty('voices')
-        for voice in voices:
-            self.voice_combo.addItem(voice.name, voice.id)
-        
+        self.voice_combo.blockSignals(True)
+        self.voice_combo.clear()
+        for name, voice_id in voices:
+            self.voice_combo.addItem(name, voice_id)
+        self.voice_combo.blockSignals(False)
         self.voice_combo.currentIndexChanged.connect(self.change_voice)
         if voices:
-            self.engine.setProperty('voice', voices[0].id)
+            self.engine.set_voice(voices[0][1])
     
     def change_voice(self, index):
         voice_id = self.voice_combo.itemData(index)
-        self.engine.setProperty('voice', voice_id)
+        if self.engine and voice_id is not None:
+            self.engine.set_voice(voice_id)
     
     def update_rate(self):
         rate = self.rate_slider.value()
-        self.engine.setProperty('rate', rate)
+        if self.engine:
+            # TTSEngine takes a multiple of 100 words per minute
+            self.engine.set_rate(rate / 100)
     
     def open_file(self):
-        file_filter = "Documents (*.pdf *.docx *.txt *.epub *.jpg *.png);;PDF Files (*.pdf);;Word Documents (*.docx);;Text Files (*.txt);;EPUB Files (*.epub);;Images (*.jpg *.png)"
+        from utils.formats import file_dialog_filter
+        file_filter = file_dialog_filter()
         file_path, _ = QFileDialog.getOpenFileName(self, "Open Document", "", file_filter)
         
         if file_path:
@@ -117,93 +138,117 @@ class ReadAloudApp(QMainWindow):
             self.load_document(file_path)
     
     def load_document(self, file_path):
+        """Extract the document in the background; reading can start with the first chunk"""
+        self.cancel_extraction()
         self.text_content = ""
-        extension = os.path.splitext(file_path)[1].lower()
+        self._text_parts = []
+        self.text_display.clear_document()
+        if self.engine:
+            self.engine.set_text("")
+        self.play_button.setEnabled(False)
         
-        try:
-            if extension == '.pdf':
-                self.text_content = self.extract_text_from_pdf(file_path)
-            elif extension == '.docx':
-                self.text_content = self.extract_text_from_docx(file_path)
-            elif extension == '.txt':
-                with open(file_path, 'r', encoding='utf-8') as file:
-                    self.text_content = file.read()
-            elif extension == '.epub':
-                self.text_content = self.extract_text_from_epub(file_path)
-            elif extension in ['.jpg', '.png', '.jpeg']:
-                self.text_content = self.extract_text_from_image(file_path)
-            
-            self.text_display.setPlainText(self.text_content)
-            self.play_button.setEnabled(bool(self.text_content))
-            
-        except Exception as e:
-            self.text_display.setPlainText(f"Error loading document: {str(e)}")
-            self.play_button.setEnabled(False)
+        if self.text_extractor is None:
+            from utils.text_extractor import TextExtractor
+            self.text_extractor = TextExtractor()
+        
+        worker = ExtractionWorker(self.text_extractor, file_path, self)
+        worker.chunk_ready.connect(self.on_chunk_ready)
+        worker.failed.connect(self.on_extraction_failed)
+        worker.finished.connect(self.on_extraction_finished)
+        self.extraction_worker = worker
+        worker.start()
     
-    def extract_text_from_pdf(self, file_path):
-        text = ""
-        try:
-            doc = fitz.open(file_path)
-            for page in doc:
-                text += page.get_text()
-            doc.close()
-        except Exception as e:
-            text = f"Error extracting PDF text: {str(e)}"
-        return text
+    def cancel_extraction(self):
+        """Cancel the running extraction, if any; its late signals are ignored"""
+        if self.extraction_worker is not None:
+            self.extraction_worker.cancel()
+            self.extraction_worker = None
     
-    def extract_text_from_docx(self, file_path):
-        text = ""
-        try:
-            doc = Document(file_path)
-            for para in doc.paragraphs:
-                text += para.text + "\n"
-        except Exception as e:
-            text = f"Error extracting DOCX text: {str(e)}"
-        return text
+    def _is_current_worker(self):
+        worker = self.sender()
+        return worker is not None and worker is self.extraction_worker
     
-    def extract_text_from_epub(self, file_path):
-        text = ""
-        try:
-            book = epub.read_epub(file_path)
-            for item in book.get_items():
-                if item.get_type() == ebooklib.ITEM_DOCUMENT:
-                    content = item.get_content()
-                    soup = BeautifulSoup(content, 'html.parser')
-                    text += soup.get_text() + "\n"
-        except Exception as e:
-            text = f"Error extracting EPUB text: {str(e)}"
-        return text
+    def on_chunk_ready(self, chunk):
+        if not self._is_current_worker() or self.extraction_worker.is_cancelled():
+            return
+        
+        self._text_parts.append(chunk.text)
+        self.text_display.append_chunk(chunk)
+        if self.engine:
+            self.engine.append_text(chunk.text, chunk.kind in ('page', 'chapter'))
+        if chunk.index == 0:
+            self.play_button.setEnabled(self.engine is not None)
     
-    def extract_text_from_image(self, file_path):
-        try:
-            image = Image.open(file_path)
-            text = pytesseract.image_to_string(image)
-            return text
-        except Exception as e:
-            return f"Error extracting text from image: {str(e)}"
+    def on_extraction_failed(self, message):
+        if not self._is_current_worker():
+            return
+        
+        self.extraction_worker = None
+        self.text_content = "".join(self._text_parts)
+        if self.engine:
+            self.engine.finish_text()
+        if not self._text_parts:
+            self.text_display.setPlainText(f"Error loading document: {message}")
+    
+    def on_extraction_finished(self):
+        worker = self.sender()
+        if worker is not None:
+            worker.deleteLater()
+        if worker is not self.extraction_worker:
+            return
+        
+        self.extraction_worker = None
+        self.text_content = "".join(self._text_parts)
+        if self.engine:
+            self.engine.finish_text()
+        if not self._text_parts:
+            self.text_display.setPlainText("Error loading document: no text found")
+    
+    def on_playback_position(self, position, length):
+        """Highlight the word being spoken"""
+        word = (position, position + length) if length else None
+        self.text_display.highlight(self.engine.sentence_bounds(position), word)
+    
+    def on_playback_status(self, status):
+        playing = status == 'playing'
+        self.play_button.setEnabled(not playing and bool(self._text_parts))
+        self.pause_button.setEnabled(playing)
+        self.stop_button.setEnabled(status in ('playing', 'paused'))
+        if status in ('stopped', 'finished'):
+            self.text_display.clear_highlight()
     
     def play_text(self):
-        if self.text_content:
-            self.engine.say(self.text_content)
-            self.engine.runAndWait()
-            self.play_button.setEnabled(False)
-            self.pause_button.setEnabled(True)
-            self.stop_button.setEnabled(True)
+        if self._text_parts and self.engine:
+            self.engine.play()
     
     def pause_text(self):
-        self.engine.stop()
-        self.play_button.setEnabled(True)
-        self.pause_button.setEnabled(False)
+        if self.engine:
+            self.engine.pause()
     
     def stop_text(self):
-        self.engine.stop()
-        self.play_button.setEnabled(True)
-        self.pause_button.setEnabled(False)
-        self.stop_button.setEnabled(False)
+        if self.engine:
+            self.engine.stop()
+    
+    def closeEvent(self, event):
+        self.cancel_extraction()
+        for worker in self.findChildren(ExtractionWorker):
+            worker.cancel()
+            worker.wait()
+        if self.engine:
+            self.engine.stop()
+            self.engine.shutdown()
+        event.accept()
 
 def main():
+    from utils.metrics import configure_from_environment
+    configure_from_environment()
     app = QApplication(sys.argv)
-    window = ReadAloudApp()
+    if '--simple' in sys.argv[1:]:
+        window = ReadAloudApp()
+    else:
+        # The full window: search, the reading queue and the debug panel
+        from gui.main_window import MainWindow
+        window = MainWindow()
     window.show()
     sys.exit(app.exec_())
 
@@ -0,0 +1,55 @@
+"""Run ReadAloud as a local speech service
+
+Usage: python serve.py [--port 8765 | --socket PATH] [options]
+
+POST a document, or text with Content-Type text/plain, to /speak and read
+back a WAV stream as it is synthesized:
+
+    curl --data-binary @book.pdf "http://127.0.0.1:8765/speak?name=book.pdf&rate=180" -o book.wav
+    curl -H "Content-Type: text/plain" --data "Hello there." http://127.0.0.1:8765/speak -o hello.wav
+
+GET /status reports the conversions in progress and the service metrics.
+"""
+import argparse
+import asyncio
+import sys
+
+from utils.service import SpeechService
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Serve text-to-speech over local HTTP")
+    parser.add_argument('--host', default='127.0.0.1', help="address to listen on (default: localhost only)")
+    parser.add_argument('--port', type=int, default=8765, help="TCP port to listen on")
+    parser.add_argument('--socket', default=None, help="listen on this Unix socket instead of TCP")
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help="speech engine processes (default: all cores)")
+    parser.add_argument('--max-jobs', type=int, default=None,
+                        help="conversions run at once (default: one per worker)")
+    parser.add_argument('--max-queued', type=int, default=16,
+                        help="conversions waiting for a slot before new ones are refused")
+    parser.add_argument('--rate', type=int, default=150, help="default speech rate in words per minute")
+    parser.add_argument('--volume', type=float, default=1.0, help="default volume from 0.0 to 1.0")
+    parser.add_argument('--voice', default=None, help="default pyttsx3 voice id")
+    return parser.parse_args(argv)
+
+async def serve(args):
+    service = SpeechService(args.workers, args.max_jobs, args.max_queued,
+                            {'rate': args.rate, 'volume': args.volume, 'voice': args.voice})
+    try:
+        await service.start(args.host, args.port, args.socket)
+        where = args.socket or f"http://{args.host}:{args.port}"
+        print(f"ReadAloud service listening on {where} with {service.workers} speech engines", flush=True)
+        await service.serve_forever()
+    finally:
+        service.close()
+
+def main(argv=None):
+    args = parse_args(argv if argv is not None else sys.argv[1:])
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
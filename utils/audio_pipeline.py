@@ -0,0 +1,430 @@
+# Offline synthesis to WAV buffers and gapless playback of those buffers
+import io
+import logging
+import os
+import queue
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import wave
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+import pyttsx3
+
+from utils.metrics import METRICS
+from utils.text_segmenter import iter_sentences
+
+try:
+    import winsound
+except ImportError:  # Not on Windows
+    winsound = None
+
+log = logging.getLogger('readaloud.audio')
+
+# pyttsx3 engine owned by a renderer worker process
+_render_engine = None
+
+def init_render_engine(driver_name=None):
+    global _render_engine
+    _render_engine = pyttsx3.init(driver_name)
+
+def render_to_path(text, path, properties):
+    """Synthesize text into a WAV file; runs in a renderer worker process
+    
+    properties maps pyttsx3 property names ('voice', 'rate', 'volume') to
+    values and is applied before synthesis.
+    """
+    if _render_engine is None:
+        init_render_engine()
+    for name, value in properties.items():
+        if value is not None:
+            _render_engine.setProperty(name, value)
+    
+    _render_engine.save_to_file(text, path)
+    _render_engine.runAndWait()
+
+def render_to_wav(text, properties):
+    """Synthesize text to WAV bytes; runs in a renderer worker process"""
+    fd, path = tempfile.mkstemp(suffix='.wav', prefix='readaloud-')
+    os.close(fd)
+    try:
+        render_to_path(text, path, properties)
+        with open(path, 'rb') as file:
+            return file.read()
+    finally:
+        os.remove(path)
+
+def wav_duration(data):
+    """Length of a WAV buffer in seconds"""
+    with wave.open(io.BytesIO(data), 'rb') as wav:
+        return wav.getnframes() / float(wav.getframerate() or 1)
+
+class SpeechRenderer:
+    """Renders text to WAV bytes in a background process with its own engine
+    
+    pyttsx3 keeps one engine per process, so offline synthesis cannot share
+    the live engine; a dedicated process also keeps slow voices off the GUI
+    and playback threads.
+    """
+    
+    def __init__(self, workers=1, cache=None):
+        self._pool = ProcessPoolExecutor(max_workers=workers, initializer=init_render_engine)
+        # Optional AudioCache; hits skip the speech engine entirely
+        self.cache = cache
+        self._last_done = 0.0  # When the previous render finished, for 'tts.render'
+        self._pending = set()  # Renders not done yet, cancelled by shutdown()
+    
+    def submit(self, text, properties):
+        """Start rendering text; returns a Future resolving to WAV bytes"""
+        if self.cache is None:
+            return self._render(text, properties)
+        
+        key = self.cache.key_for(text, properties)
+        data = self.cache.get(key)
+        if data is not None:
+            future = Future()
+            future.set_result(data)
+            return future
+        
+        future = self._render(text, properties)
+        future.add_done_callback(lambda done: self._store(key, done))
+        return future
+    
+    def _render(self, text, properties):
+        submitted = time.perf_counter()
+        future = self._pool.submit(render_to_wav, text, dict(properties))
+        self._pending.add(future)
+        future.add_done_callback(self._pending.discard)
+        future.add_done_callback(lambda done: self._record(done, submitted, len(text)))
+        return future
+    
+    def _record(self, future, submitted, characters):
+        # Renders queue behind each other, so one took from when it was
+        # submitted or the previous one finished, whichever is later
+        # (exact for the default single worker)
+        if future.cancelled():
+            return
+        now = time.perf_counter()
+        METRICS.record('tts.render', now - max(submitted, self._last_done), characters=characters)
+        self._last_done = now
+    
+    def _store(self, key, future):
+        if not future.cancelled() and future.exception() is None:
+            self.cache.put(key, future.result())
+    
+    def shutdown(self):
+        # shutdown(cancel_futures=True) needs Python 3.9
+        for future in list(self._pending):
+            future.cancel()
+        self._pool.shutdown(wait=False)
+
+# Sample formats by sample width in bytes, as the players name them
+_ALSA_FORMATS = {1: 'U8', 2: 'S16_LE', 4: 'S32_LE'}
+_PULSE_FORMATS = {1: 'u8', 2: 's16le', 4: 's32le'}
+
+class WavPlayer:
+    """Plays WAV buffers one after another; stop() may be called from any thread
+    
+    With paplay or aplay the samples of every buffer are written into one
+    long-running player process, so consecutive sentences follow each
+    other without a process start in between. Writing is paced to stay
+    BUFFER_AHEAD seconds ahead of what is heard: play() returns just before
+    a buffer ends, in time for the next one, and stop() only has that much
+    queued audio to cut off. afplay and winsound play one file per buffer.
+    """
+    
+    BUFFER_AHEAD = 0.2
+    BLOCK_SECONDS = 0.05  # Samples written at a time
+    
+    def __init__(self):
+        self._stop_event = threading.Event()
+        self._process = None
+        self._format = None  # (channels, sample width, frame rate) of the running player
+        self._ends_at = 0.0  # perf_counter time at which the audio written so far ends
+        self._command = self._find_command()
+    
+    @staticmethod
+    def _find_command():
+        if winsound is not None:
+            return None
+        candidates = ['afplay'] if sys.platform == 'darwin' else ['paplay', 'aplay']
+        for name in candidates:
+            path = shutil.which(name)
+            if path:
+                return name, path
+        return None
+    
+    def _stream_command(self, channels, width, rate):
+        """Command line reading raw samples from stdin, or None for afplay"""
+        name, path = self._command
+        if width not in _ALSA_FORMATS:
+            return None
+        if name == 'paplay':
+            return [path, '--raw', f'--format={_PULSE_FORMATS[width]}', f'--rate={rate}',
+                    f'--channels={channels}']
+        if name == 'aplay':
+            return [path, '-q', '-t', 'raw', '-f', _ALSA_FORMATS[width], '-r', str(rate),
+                    '-c', str(channels), '-']
+        return None
+    
+    def play(self, data):
+        """Play a WAV buffer to (nearly) the end; returns False if it was stopped
+        
+        A stop() issued after the last reset() also cancels this call.
+        """
+        if winsound is None and self._command is None:
+            raise RuntimeError("No audio player found (install paplay or aplay)")
+        if winsound is None:
+            with wave.open(io.BytesIO(data), 'rb') as wav:
+                audio_format = (wav.getnchannels(), wav.getsampwidth(), wav.getframerate())
+                frames = wav.readframes(wav.getnframes())
+            command = self._stream_command(*audio_format)
+            if command is not None:
+                return self._stream(command, audio_format, frames)
+        return self._play_file(data)
+    
+    def _stream(self, command, audio_format, frames):
+        if self._process is None or self._process.poll() is not None or audio_format != self._format:
+            self.close()
+            self._process = subprocess.Popen(command, stdin=subprocess.PIPE)
+            self._format = audio_format
+            self._ends_at = time.perf_counter()
+        
+        channels, width, rate = audio_format
+        frame_size = channels * width
+        bytes_per_second = frame_size * rate
+        block = max(1, int(rate * self.BLOCK_SECONDS)) * frame_size
+        process = self._process
+        for offset in range(0, len(frames), block):
+            if self._wait_until_due():
+                return False
+            piece = frames[offset:offset + block]
+            try:
+                process.stdin.write(piece)
+                process.stdin.flush()
+            except (OSError, ValueError):
+                # stop() terminates the player, which breaks the pipe
+                self.close()
+                if self._stop_event.is_set():
+                    return False
+                raise RuntimeError("Audio player exited unexpectedly")
+            self._ends_at = max(self._ends_at, time.perf_counter()) + len(piece) / bytes_per_second
+        return not self._wait_until_due()
+    
+    def _wait_until_due(self):
+        """Sleep until the next write is due; True (and the player closed) if stopped"""
+        delay = self._ends_at - self.BUFFER_AHEAD - time.perf_counter()
+        if self._stop_event.wait(max(0.0, delay)):
+            self.close()
+            return True
+        return False
+    
+    def _play_file(self, data):
+        fd, path = tempfile.mkstemp(suffix='.wav', prefix='readaloud-')
+        with os.fdopen(fd, 'wb') as file:
+            file.write(data)
+        
+        try:
+            if winsound is not None:
+                winsound.PlaySound(path, winsound.SND_FILENAME | winsound.SND_ASYNC | winsound.SND_NODEFAULT)
+                stopped = self._stop_event.wait(wav_duration(data))
+                if stopped:
+                    winsound.PlaySound(None, 0)
+                return not stopped
+            
+            process = self._process = subprocess.Popen([self._command[1], path])
+            while process.poll() is None:
+                if self._stop_event.wait(0.01):
+                    self.close()
+                    return False
+            return True
+        finally:
+            self._process = None
+            os.remove(path)
+    
+    def reset(self):
+        """Clear an earlier stop() before starting the next buffer"""
+        self._stop_event.clear()
+    
+    def stop(self):
+        """Cut playback off, including audio already handed to the player"""
+        self._stop_event.set()
+        process = self._process
+        if process is not None and process.poll() is None:
+            process.terminate()
+    
+    def close(self):
+        """End the player process; the next play() starts a new one"""
+        process, self._process = self._process, None
+        if process is None:
+            return
+        if process.stdin is not None:
+            try:
+                process.stdin.close()
+            except OSError:
+                pass
+        if process.poll() is None:
+            process.terminate()
+        process.wait()
+
+class PrerenderedPlayback:
+    """Reads text by synthesizing sentences ahead of the playhead
+    
+    Up to `lookahead` sentences are rendered to WAV buffers on a background
+    process while the current one plays, which caps memory at a few
+    buffers. Rendered buffers are kept across pause, so resuming replays the
+    interrupted sentence straight away.
+    """
+    
+    def __init__(self, get_text, on_position, on_finished, lookahead=4, cache=None):
+        self.get_text = get_text  # Callable returning the document text
+        self.on_position = on_position  # Called with the offset being spoken
+        self.on_finished = on_finished  # Called when the end of the text is reached
+        self.lookahead = lookahead
+        self.properties = {}
+        
+        self.renderer = SpeechRenderer(cache=cache)
+        self.player = WavPlayer()
+        self.command_queue = queue.Queue()
+        self._buffers = deque()  # (start, end, Future) in reading order
+        self._next_position = 0
+        self._playing = False
+        # False while the text is still growing; running out of sentences
+        # then means waiting for more rather than the end of the document
+        self._text_complete = True
+        self._starved = False
+        
+        self.thread = threading.Thread(target=self._run)
+        self.thread.daemon = True
+        self.thread.start()
+    
+    def play(self, position):
+        self.command_queue.put(('play', position))
+    
+    def pause(self):
+        self.command_queue.put(('pause', None))
+        self.player.stop()
+    
+    def stop(self):
+        self.pause()
+    
+    def seek(self, position):
+        self.command_queue.put(('seek', position))
+        self.player.stop()
+    
+    def set_property(self, name, value):
+        """Change voice, rate or volume; buffers rendered with old values are dropped"""
+        self.command_queue.put(('property', (name, value)))
+    
+    def text_changed(self, complete):
+        """Report that text was appended, or with complete=True that the text is whole"""
+        self.command_queue.put(('text', complete))
+    
+    def prefetch(self, text, sentences=None):
+        """Render the first sentences of text into the audio cache ahead of time
+        
+        Used for a document that is about to be read; without a cache there
+        is nowhere to keep the audio, so nothing is done.
+        """
+        if self.renderer.cache is not None:
+            self.command_queue.put(('prefetch', (text, sentences or self.lookahead)))
+    
+    def shutdown(self):
+        self.command_queue.put(('quit', None))
+        self.player.stop()
+        self.renderer.shutdown()
+    
+    def _restart_from(self, position):
+        """Discard buffers unless the first one already starts at position"""
+        if self._buffers and self._buffers[0][0] == position:
+            return
+        self._discard_buffers(position)
+    
+    def _discard_buffers(self, position):
+        for _, _, future in self._buffers:
+            future.cancel()
+        self._buffers.clear()
+        self._next_position = position
+    
+    def _fill_lookahead(self):
+        text = self.get_text()
+        for start, end in iter_sentences(text, self._next_position):
+            if len(self._buffers) >= self.lookahead:
+                break
+            future = self.renderer.submit(text[start:end], self.properties)
+            self._buffers.append((start, end, future))
+            self._next_position = end
+    
+    def _handle(self, command, value):
+        if command == 'play':
+            self._playing = True
+            self._restart_from(value)
+        elif command == 'pause':
+            self._playing = False
+        elif command == 'text':
+            self._text_complete = value
+        elif command == 'seek':
+            self._restart_from(value)
+        elif command == 'property':
+            name, setting = value
+            self.properties[name] = setting
+            # Re-render from the sentence at the playhead with the new setting
+            self._discard_buffers(self._buffers[0][0] if self._buffers else self._next_position)
+        elif command == 'prefetch':
+            # Rendered with the current settings, so the cache keys match when it is read
+            text, count = value
+            for (start, end), _ in zip(iter_sentences(text), range(count)):
+                self.renderer.submit(text[start:end], self.properties)
+    
+    def _run(self):
+        while True:
+            try:
+                if not self._playing or self._starved:
+                    command, value = self.command_queue.get()
+                else:
+                    command, value = self.command_queue.get_nowait()
+            except queue.Empty:
+                command = None
+            
+            if command == 'quit':
+                self.player.close()
+                return
+            if command is not None:
+                # Any command may have made more text playable
+                self._starved = False
+                self._handle(command, value)
+                continue
+            
+            try:
+                self._play_next()
+            except Exception:
+                log.exception("Audio pipeline error")
+                self._playing = False
+    
+    def _play_next(self):
+        self._fill_lookahead()
+        if not self._buffers:
+            if not self._text_complete:
+                # Caught up with extraction; block until text_changed()
+                self._starved = True
+                return
+            self._playing = False
+            self.on_finished()
+            return
+        
+        start, end, future = self._buffers[0]
+        # Time playback stalls waiting for synthesis; above zero is a gap
+        with METRICS.timer('tts.render_wait'):
+            data = future.result()
+        self.player.reset()
+        if not self.command_queue.empty():
+            # A command arrived while rendering; handle it before playing
+            return
+        
+        self.on_position(start)
+        if self.player.play(data):
+            self._buffers.popleft()
+            self.on_position(end)
@@ -0,0 +1,203 @@
+# Headless conversion of documents to audio files
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from utils.audio_pipeline import init_render_engine, render_to_path
+from utils.formats import supported_extensions
+from utils.text_extractor import TextExtractor
+
+SUPPORTED_EXTENSIONS = supported_extensions()
+MANIFEST_NAME = '.readaloud-batch.json'
+
+def find_documents(paths, recursive=True):
+    """Expand files and directories into a sorted list of supported documents"""
+    documents = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.lower().endswith(SUPPORTED_EXTENSIONS):
+                        documents.append(os.path.join(root, name))
+                if not recursive:
+                    break
+        elif os.path.isfile(path):
+            documents.append(path)
+        else:
+            raise FileNotFoundError(f"File not found: {path}")
+    return [os.path.abspath(document) for document in documents]
+
+def _safe_name(text):
+    return re.sub(r'[^\w\-. ]+', '_', text).strip() or 'audio'
+
+def convert_document(file_path, output_base, properties, split_chapters):
+    """Extract one document and render it to WAV; runs in a worker process
+    
+    Returns a dict with the written files and the time spent per stage.
+    """
+    started = time.perf_counter()
+    # Nested process pools are not available inside a worker process
+    extractor = TextExtractor(pdf_workers=1, ocr_workers=1)
+    chunks = list(extractor.iter_chunks(file_path))
+    extracted = time.perf_counter()
+    
+    if split_chapters and any(chunk.kind == 'chapter' for chunk in chunks):
+        os.makedirs(output_base, exist_ok=True)
+        parts = [(os.path.join(output_base, f"{chunk.index + 1:03d}.wav"), chunk.text)
+                 for chunk in chunks if chunk.text.strip()]
+    else:
+        parts = [(output_base + '.wav', "".join(chunk.text for chunk in chunks))]
+    
+    outputs = []
+    for path, text in parts:
+        if not text.strip():
+            continue
+        tmp_path = path + '.part.wav'
+        render_to_path(text, tmp_path, properties)
+        os.replace(tmp_path, path)
+        outputs.append(path)
+    finished = time.perf_counter()
+    
+    return {
+        'outputs': outputs,
+        'characters': sum(len(chunk.text) for chunk in chunks),
+        'extract_seconds': extracted - started,
+        'synthesis_seconds': finished - extracted,
+        'total_seconds': finished - started,
+    }
+
+class BatchConverter:
+    """Converts many documents to audio across a pool of worker processes
+    
+    Each worker owns one pyttsx3 engine. Progress is recorded in a manifest
+    in the output folder after every document, so an interrupted run picks
+    up where it stopped and unchanged documents are skipped.
+    """
+    
+    def __init__(self, output_dir, workers=None, properties=None, split_chapters=False):
+        self.output_dir = os.path.abspath(output_dir)
+        self.workers = workers or os.cpu_count() or 1
+        self.properties = properties or {}
+        self.split_chapters = split_chapters
+        self.manifest_path = os.path.join(self.output_dir, MANIFEST_NAME)
+        self.manifest = self._load_manifest()
+    
+    def _load_manifest(self):
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+    
+    def _save_manifest(self):
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump(self.manifest, file, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+    
+    def _output_base(self, file_path, root):
+        # The source extension stays in the name: report.md and report.txt
+        # become report.md.wav and report.txt.wav
+        relative = os.path.relpath(file_path, root) if root else os.path.basename(file_path)
+        folder, name = os.path.split(relative)
+        return os.path.join(self.output_dir, folder, _safe_name(name))
+    
+    def _output_bases(self, documents, root):
+        """Map each document to an output path (without .wav) no other document shares
+        
+        Names can still collide, e.g. the same file name from two input
+        folders, or names differing only in case or in characters
+        _safe_name replaces. Later documents get " (2)", " (3)" and so on,
+        in document order, so a re-run assigns the same names.
+        """
+        bases = {}
+        taken = set()
+        for file_path in documents:
+            base = candidate = self._output_base(file_path, root)
+            number = 2
+            while candidate.casefold() in taken:
+                candidate = f"{base} ({number})"
+                number += 1
+            taken.add(candidate.casefold())
+            bases[file_path] = candidate
+        return bases
+    
+    def _signature(self, file_path):
+        stat = os.stat(file_path)
+        return {'size': stat.st_size, 'mtime': stat.st_mtime, 'properties': self.properties,
+                'split_chapters': self.split_chapters}
+    
+    def is_done(self, file_path):
+        entry = self.manifest.get(file_path)
+        return (entry is not None and entry.get('status') == 'done'
+                and entry.get('signature') == self._signature(file_path)
+                and all(os.path.exists(path) for path in entry.get('outputs', [])))
+    
+    def run(self, documents, root=None, on_result=None):
+        """Convert documents, calling on_result(file_path, entry) as each finishes
+        
+        root is the folder document paths are made relative to when laying
+        out the output tree. Returns the manifest entries for this run.
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        # Assigned before any job starts, so no two jobs write the same file
+        output_bases = self._output_bases(documents, root)
+        results = {}
+        pending = []
+        for file_path in documents:
+            if self.is_done(file_path):
+                results[file_path] = dict(self.manifest[file_path], skipped=True)
+                if on_result:
+                    on_result(file_path, results[file_path])
+            else:
+                pending.append(file_path)
+        
+        if not pending:
+            return results
+        
+        with ProcessPoolExecutor(max_workers=min(self.workers, len(pending)),
+                                 initializer=init_render_engine) as pool:
+            futures = {}
+            for file_path in pending:
+                output_base = output_bases[file_path]
+                os.makedirs(os.path.dirname(output_base), exist_ok=True)
+                future = pool.submit(convert_document, file_path, output_base,
+                                     self.properties, self.split_chapters)
+                futures[future] = file_path
+            
+            for future in as_completed(futures):
+                file_path = futures[future]
+                try:
+                    entry = dict(future.result(), status='done')
+                except Exception as e:
+                    entry = {'status': 'failed', 'error': str(e)}
+                entry['signature'] = self._signature(file_path)
+                
+                self.manifest[file_path] = entry
+                self._save_manifest()
+                results[file_path] = entry
+                if on_result:
+                    on_result(file_path, entry)
+        return results
+
+def format_summary(results):
+    """Table of per-document timings for the end of a batch run"""
+    lines = [f"{'status':<8} {'extract':>8} {'speech':>8} {'total':>8}  document"]
+    for file_path, entry in results.items():
+        status = 'skipped' if entry.get('skipped') else entry.get('status', '?')
+        if entry.get('status') == 'done':
+            lines.append(f"{status:<8} {entry['extract_seconds']:>7.1f}s {entry['synthesis_seconds']:>7.1f}s "
+                         f"{entry['total_seconds']:>7.1f}s  {file_path}")
+        else:
+            lines.append(f"{status:<8} {'':>8} {'':>8} {'':>8}  {file_path}: {entry.get('error', '')}")
+    
+    done = [entry for entry in results.values() if entry.get('status') == 'done' and not entry.get('skipped')]
+    failed = sum(1 for entry in results.values() if entry.get('status') == 'failed')
+    skipped = sum(1 for entry in results.values() if entry.get('skipped'))
+    total_seconds = sum(entry['total_seconds'] for entry in done)
+    lines.append(f"{len(done)} converted, {skipped} skipped, {failed} failed; "
+                 f"{total_seconds:.1f}s of worker time")
+    return "\n".join(lines)
@@ -0,0 +1,253 @@
+# Persistent caches shared by the extractor and the speech engine
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import zlib
+from collections import OrderedDict
+
+def default_cache_dir(name):
+    """Return the per-user cache folder for the given cache name"""
+    base = os.environ.get('LOCALAPPDATA') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'ReadAloud', name)
+
+class DiskLRUCache:
+    """Size-bounded key/value store of files, evicting least recently used
+    
+    Recency is tracked through file modification times, which are bumped on
+    every hit, so the order survives restarts without a separate index file.
+    The directory is scanned once when the cache is opened; after that an
+    in-memory index of entry sizes in recency order keeps puts and
+    evictions independent of how many entries there are.
+    """
+    
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._index = OrderedDict()  # key -> size in bytes, least recently used first
+        self._total = 0
+        for path, size, _ in sorted(self._entries(), key=lambda entry: entry[2]):
+            self._index[os.path.basename(path)] = size
+            self._total += size
+    
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key)
+    
+    def get(self, key):
+        """Return the stored bytes for key, or None"""
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as file:
+                data = file.read()
+            os.utime(path)
+        except OSError:
+            self._forget(key)
+            return None
+        with self._lock:
+            if key in self._index:
+                self._index.move_to_end(key)
+            else:
+                # Written by another process since the scan
+                self._index[key] = len(data)
+                self._total += len(data)
+        return data
+    
+    def put(self, key, data):
+        """Store bytes under key, then evict old entries above max_bytes"""
+        if len(data) > self.max_bytes:
+            return
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        
+        # Write to a temporary file first so readers never see half an entry
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                file.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        with self._lock:
+            self._total += len(data) - self._index.pop(key, 0)
+            self._index[key] = len(data)
+        self._evict()
+    
+    def remove(self, key):
+        self._forget(key)
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+    
+    def clear(self):
+        """Remove every entry"""
+        with self._lock:
+            self._index.clear()
+            self._total = 0
+        for path, _, _ in self._entries():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+    
+    def size(self):
+        """Total size of all entries in bytes"""
+        return self._total
+    
+    def _forget(self, key):
+        with self._lock:
+            self._total -= self._index.pop(key, 0)
+    
+    def _entries(self):
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith('.tmp'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((path, stat.st_size, stat.st_mtime))
+        return entries
+    
+    def _evict(self):
+        while True:
+            with self._lock:
+                if self._total <= self.max_bytes or not self._index:
+                    return
+                key, size = self._index.popitem(last=False)
+                self._total -= size
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+class ExtractionCache:
+    """Caches extracted text keyed by file contents and extractor settings"""
+    
+    DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+    
+    def __init__(self, directory=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.store = DiskLRUCache(directory or default_cache_dir('extraction'), max_bytes)
+        # (path, size, mtime) -> content hash, so an unchanged file is only hashed once
+        self._hashes = {}
+    
+    def key_for(self, file_path, options):
+        """Cache key from a hash of the file contents plus extractor options"""
+        stat = os.stat(file_path)
+        identity = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+        content_hash = self._hashes.get(identity)
+        if content_hash is None:
+            digest = hashlib.sha256()
+            with open(file_path, 'rb') as file:
+                for block in iter(lambda: file.read(1024 * 1024), b''):
+                    digest.update(block)
+            content_hash = digest.hexdigest()
+            self._hashes[identity] = content_hash
+        
+        options_json = json.dumps(options, sort_keys=True)
+        return hashlib.sha256(f"{content_hash}:{options_json}".encode('utf-8')).hexdigest()
+    
+    def load(self, key):
+        """Return the cached list of (kind, text) chunks, or None"""
+        data = self.store.get(key)
+        if data is None:
+            return None
+        try:
+            entry = json.loads(zlib.decompress(data).decode('utf-8'))
+        except (zlib.error, ValueError):
+            self.store.remove(key)
+            return None
+        
+        text = entry['text']
+        parts = []
+        offset = 0
+        for kind, length in zip(entry['kinds'], entry['lengths']):
+            parts.append((kind, text[offset:offset + length]))
+            offset += length
+        return parts
+    
+    def save(self, key, parts):
+        """Store a complete list of (kind, text) chunks"""
+        entry = {
+            'kinds': [kind for kind, _ in parts],
+            'lengths': [len(text) for _, text in parts],
+            'text': "".join(text for _, text in parts),
+        }
+        self.store.put(key, zlib.compress(json.dumps(entry).encode('utf-8'), 6))
+    
+    def invalidate(self, key=None):
+        """Forget one cached extraction, or all of them when key is None"""
+        if key is None:
+            self.store.clear()
+            self._hashes.clear()
+        else:
+            self.store.remove(key)
+
+class AudioCache:
+    """Caches synthesized sentence audio keyed by text and voice settings
+    
+    A small in-memory tier holds the most recently used clips in front of
+    the size-bounded disk store, so seeking back within a chapter does not
+    even touch the disk.
+    """
+    
+    DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+    DEFAULT_MEMORY_BYTES = 32 * 1024 * 1024
+    
+    def __init__(self, directory=None, max_bytes=DEFAULT_MAX_BYTES, memory_bytes=DEFAULT_MEMORY_BYTES):
+        self.store = DiskLRUCache(directory or default_cache_dir('audio'), max_bytes)
+        self.memory_bytes = memory_bytes
+        self._memory = OrderedDict()
+        self._memory_size = 0
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def key_for(text, properties):
+        """Key from whitespace-normalized text plus voice, rate and volume"""
+        normalized = " ".join(text.split())
+        settings = json.dumps([properties.get('voice'), properties.get('rate'), properties.get('volume')])
+        return hashlib.sha256(f"{settings}\n{normalized}".encode('utf-8')).hexdigest()
+    
+    def get(self, key):
+        """Return cached WAV bytes, or None"""
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                return data
+        
+        data = self.store.get(key)
+        if data is not None:
+            self._remember(key, data)
+        return data
+    
+    def put(self, key, data):
+        self._remember(key, data)
+        self.store.put(key, data)
+    
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._memory_size = 0
+        self.store.clear()
+    
+    def _remember(self, key, data):
+        if len(data) > self.memory_bytes:
+            return
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return
+            self._memory[key] = data
+            self._memory_size += len(data)
+            while self._memory_size > self.memory_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_size -= len(evicted)
@@ -0,0 +1,61 @@
+# Streaming EPUB text extraction in spine (reading) order
+import posixpath
+import zipfile
+from urllib.parse import unquote
+import xml.etree.ElementTree as ElementTree
+
+from utils.html_text import html_to_text
+
+CONTAINER_PATH = 'META-INF/container.xml'
+
+def _local(tag):
+    """Tag name without its XML namespace"""
+    return tag.rsplit('}', 1)[-1]
+
+class EpubReader:
+    """Reads chapters straight from the EPUB zip, following the spine
+    
+    Only the container, the package document and the chapter being read are
+    loaded, so memory stays proportional to one chapter.
+    """
+    
+    def __init__(self, file_path):
+        self.file_path = file_path
+    
+    def spine(self, archive):
+        """Zip member names of the content documents in reading order"""
+        container = ElementTree.fromstring(archive.read(CONTAINER_PATH))
+        rootfile = next(element for element in container.iter() if _local(element.tag) == 'rootfile')
+        opf_path = rootfile.get('full-path')
+        opf_dir = posixpath.dirname(opf_path)
+        package = ElementTree.fromstring(archive.read(opf_path))
+        
+        manifest = {}
+        spine = []
+        for element in package.iter():
+            name = _local(element.tag)
+            if name == 'item':
+                manifest[element.get('id')] = element.get('href')
+            elif name == 'itemref':
+                spine.append(element.get('idref'))
+        
+        names = set(archive.namelist())
+        members = []
+        for idref in spine:
+            href = manifest.get(idref)
+            if href:
+                # hrefs are URL-encoded and relative to the package document
+                member = posixpath.normpath(posixpath.join(opf_dir, unquote(href.split('#')[0])))
+                if member in names:
+                    members.append(member)
+        return members
+    
+    def chapter_count(self):
+        with zipfile.ZipFile(self.file_path) as archive:
+            return len(self.spine(archive))
+    
+    def iter_chapters(self):
+        """Yield the text of each spine document as it is parsed"""
+        with zipfile.ZipFile(self.file_path) as archive:
+            for member in self.spine(archive):
+                yield html_to_text(archive.read(member))
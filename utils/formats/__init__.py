@@ -0,0 +1,155 @@
+# Registry of document format backends, chosen by sniffing file content
+import os
+import zipfile
+
+from utils.text_encoding import detect_bom, utf16_byte_order
+
+# Where a backend should do its work: on the calling thread, or fanned out
+# over worker processes (large PDFs, OCR)
+INLINE = 'inline'
+PROCESS_POOL = 'process'
+
+# Bytes read from the start of a file to recognise its format
+SNIFF_BYTES = 4096
+
+_BACKENDS = []
+
+class ExtractorBackend:
+    """Base class for a document format
+    
+    Subclasses set the class attributes and implement _iter_parts, which
+    yields (kind, text) pairs as the document is parsed. The TextExtractor
+    that owns the backend supplies shared settings such as the OCR pipeline.
+    """
+    
+    name = None  # Short identifier, also used in cache keys
+    label = None  # Format name used in error messages
+    mime_types = ()  # MIME types this backend reads, as reported by sniff_mime_type
+    extensions = ()  # File extensions, used in file dialogs and when sniffing fails
+    # Text comes with the layout's line breaks, hyphenation and running
+    # headers, which utils.text_normalizer cleans up
+    layout_text = False
+    
+    def __init__(self, extractor):
+        self.extractor = extractor
+    
+    def estimate_cost(self, file_path):
+        """INLINE for cheap documents, PROCESS_POOL for ones worth parallelizing"""
+        return INLINE
+    
+    def count_chunks(self, file_path):
+        """Number of chunks iter_parts will yield, or None if it needs a full parse"""
+        return None
+    
+    def iter_parts(self, file_path, route=None):
+        """Yield (kind, text) pairs; route defaults to estimate_cost()"""
+        if route is None:
+            route = self.estimate_cost(file_path)
+        try:
+            yield from self._iter_parts(file_path, route)
+        except Exception as e:
+            raise Exception(f"Error extracting text from {self.label}: {str(e)}")
+    
+    def _iter_parts(self, file_path, route):
+        raise NotImplementedError
+
+def register_backend(backend_class):
+    """Class decorator adding a backend to the registry
+    
+    Backends registered first win when several read the same MIME type.
+    """
+    _BACKENDS.append(backend_class)
+    return backend_class
+
+def backend_classes():
+    return list(_BACKENDS)
+
+def supported_extensions():
+    """Every file extension some backend reads, in registration order"""
+    return tuple(extension for backend in _BACKENDS for extension in backend.extensions)
+
+def file_dialog_filter():
+    """Qt file dialog filter listing every supported format"""
+    def patterns(extensions):
+        return " ".join("*" + extension for extension in extensions)
+    filters = [f"Documents ({patterns(supported_extensions())})"]
+    filters += [f"{backend.label} files ({patterns(backend.extensions)})" for backend in _BACKENDS]
+    return ";;".join(filters)
+
+def _decode_head(head):
+    """The start of a text file as a str, or None if it looks binary"""
+    encoding, bom_length = detect_bom(head)
+    encoding = encoding or utf16_byte_order(head)
+    if encoding:
+        return head[bom_length:].decode(encoding, errors='replace')
+    if b'\x00' in head:
+        return None
+    return head.decode('latin-1')
+
+def _sniff_zip(file_path):
+    """Tell EPUB, ODF and Office Open XML packages apart"""
+    try:
+        with zipfile.ZipFile(file_path) as archive:
+            names = set(archive.namelist())
+            if 'mimetype' in names:
+                return archive.read('mimetype').decode('ascii', errors='replace').strip()
+            if 'word/document.xml' in names:
+                return 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+    except (OSError, zipfile.BadZipFile):
+        return None
+    return 'application/zip'
+
+_SIGNATURES = (
+    (b'%PDF-', 'application/pdf'),
+    (b'{\\rtf', 'text/rtf'),
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+    (b'BM', 'image/bmp'),
+    (b'II*\x00', 'image/tiff'),
+    (b'MM\x00*', 'image/tiff'),
+)
+
+def sniff_mime_type(file_path):
+    """Guess a file's MIME type from its first bytes, or None if unrecognised"""
+    with open(file_path, 'rb') as file:
+        head = file.read(SNIFF_BYTES)
+    
+    for signature, mime_type in _SIGNATURES:
+        if head.startswith(signature):
+            return mime_type
+    if head.startswith(b'RIFF') and head[8:12] == b'WEBP':
+        return 'image/webp'
+    if head.startswith(b'PK\x03\x04'):
+        return _sniff_zip(file_path)
+    text = _decode_head(head)
+    if text is None:
+        return None
+    start = text[:1024].lstrip().lower()
+    if start.startswith('<') and ('<html' in start or '<!doctype html' in start):
+        return 'text/html'
+    return 'text/plain'
+
+def backend_class_for(file_path):
+    """Pick the backend for a file by content, falling back to its extension
+    
+    The extension only breaks ties between backends that accept the sniffed
+    type (plain text vs. Markdown) or decides when the content is not
+    recognised. Raises ValueError for unsupported files.
+    """
+    file_extension = os.path.splitext(file_path)[1].lower()
+    by_extension = next((backend for backend in _BACKENDS if file_extension in backend.extensions), None)
+    mime_type = sniff_mime_type(file_path)
+    
+    if by_extension is not None and (mime_type is None or mime_type in by_extension.mime_types):
+        return by_extension
+    for backend in _BACKENDS:
+        if mime_type in backend.mime_types:
+            return backend
+    if by_extension is not None:
+        return by_extension
+    raise ValueError(f"Unsupported file format: {file_extension or mime_type}")
+
+# Importing the backends registers them, in this order
+from utils.formats import pdf, word, plain, markup, epub, odt, rtf, image  # noqa: E402,F401
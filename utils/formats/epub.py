@@ -0,0 +1,22 @@
+# EPUB backend: one chunk per spine document
+from utils.formats import ExtractorBackend, register_backend
+
+@register_backend
+class EpubBackend(ExtractorBackend):
+    name = 'epub'
+    label = 'EPUB'
+    mime_types = ('application/epub+zip',)
+    extensions = ('.epub',)
+    
+    def count_chunks(self, file_path):
+        from utils.epub_reader import EpubReader
+        try:
+            return EpubReader(file_path).chapter_count()
+        except Exception:
+            return None
+    
+    def _iter_parts(self, file_path, route):
+        """Yield ('chapter', text) for each EPUB spine document, in reading order"""
+        from utils.epub_reader import EpubReader
+        for text in EpubReader(file_path).iter_chapters():
+            yield 'chapter', text + "\n\n"
@@ -0,0 +1,34 @@
+# Image backend: OCR, one chunk per horizontal band
+from utils.formats import ExtractorBackend, INLINE, PROCESS_POOL, register_backend
+from utils.ocr import MIN_OCR_WIDTH, TILE_MIN_HEIGHT
+
+@register_backend
+class ImageBackend(ExtractorBackend):
+    name = 'image'
+    label = 'image'
+    mime_types = ('image/png', 'image/jpeg', 'image/gif', 'image/bmp', 'image/tiff', 'image/webp')
+    extensions = ('.png', '.jpg', '.jpeg', '.gif', '.bmp', '.tif', '.tiff', '.webp')
+    layout_text = True
+    
+    def estimate_cost(self, file_path):
+        """Tall scans are split into bands and OCR'd across worker processes"""
+        if self.extractor.ocr.workers <= 1:
+            return INLINE
+        from PIL import Image
+        try:
+            # Opening only reads the header
+            with Image.open(file_path) as image:
+                width, height = image.size
+        except Exception:
+            return INLINE
+        if 0 < width < MIN_OCR_WIDTH:
+            # preprocess_image upscales narrow images before OCR
+            height *= min(2.0, MIN_OCR_WIDTH / width)
+        return PROCESS_POOL if height >= TILE_MIN_HEIGHT else INLINE
+    
+    def _iter_parts(self, file_path, route):
+        """Yield ('image', text) chunks from OCR, one per horizontal band"""
+        from PIL import Image
+        with Image.open(file_path) as image:
+            for text in self.extractor.ocr.iter_image_text(image, parallel=route == PROCESS_POOL):
+                yield 'image', text
@@ -0,0 +1,71 @@
+# HTML and Markdown backends: markup is stripped, one chunk per block
+import re
+
+from utils.formats import ExtractorBackend, register_backend
+from utils.formats.plain import iter_text_paragraphs
+
+@register_backend
+class HtmlBackend(ExtractorBackend):
+    name = 'html'
+    label = 'HTML'
+    mime_types = ('text/html', 'application/xhtml+xml')
+    extensions = ('.html', '.htm', '.xhtml')
+    
+    def _iter_parts(self, file_path, route):
+        """Yield ('paragraph', text) for each block element"""
+        from utils.html_text import decode_markup, iter_blocks
+        with open(file_path, 'rb') as file:
+            markup = decode_markup(file.read())
+        for block in iter_blocks(markup):
+            yield 'paragraph', block + "\n\n"
+
+_FENCE = re.compile(r'^\s*(```|~~~)')
+_RULE = re.compile(r'^\s*([-*_=])(\s*\1){2,}\s*$')
+_LINK_DEFINITION = re.compile(r'^\s*\[[^\]]+\]:\s+\S+')
+_LINE_PREFIX = re.compile(r'^\s*(?:>\s?)*(?:#{1,6}\s+|[-*+]\s+|\d+[.)]\s+)?')
+_CLOSING_HASHES = re.compile(r'\s+#+\s*$')
+_INLINE = (
+    (re.compile(r'!\[([^\]]*)\]\([^)]*\)'), r'\1'),  # Images read as their alt text
+    (re.compile(r'\[([^\]]+)\]\([^)]*\)'), r'\1'),  # Inline links
+    (re.compile(r'\[([^\]]+)\]\[[^\]]*\]'), r'\1'),  # Reference links
+    (re.compile(r'<(https?://[^>]+)>'), r'\1'),  # Autolinks
+    (re.compile(r'</?[A-Za-z][^>]*>'), ''),  # Inline HTML tags
+    (re.compile(r'`([^`]*)`'), r'\1'),
+    (re.compile(r'(\*\*|__)(?=\S)(.+?)(?<=\S)\1'), r'\2'),
+    (re.compile(r'(?<!\w)([*_])(?=\S)(.+?)(?<=\S)\1(?!\w)'), r'\2'),
+    (re.compile(r'~~(.+?)~~'), r'\1'),
+    (re.compile(r'\\([\\`*_{}\[\]()#+\-.!>])'), r'\1'),
+)
+
+def markdown_line_to_text(line):
+    """Strip block prefixes and inline formatting from one Markdown line"""
+    line = _LINE_PREFIX.sub('', line, count=1)
+    line = _CLOSING_HASHES.sub('', line)
+    for pattern, replacement in _INLINE:
+        line = pattern.sub(replacement, line)
+    return line
+
+@register_backend
+class MarkdownBackend(ExtractorBackend):
+    name = 'markdown'
+    label = 'Markdown'
+    mime_types = ('text/markdown', 'text/plain')
+    extensions = ('.md', '.markdown')
+    
+    def _iter_parts(self, file_path, route):
+        """Yield ('paragraph', text) for each block with the Markdown syntax removed
+        
+        Fenced code is read as it is, without the fences.
+        """
+        in_code = False
+        for paragraph in iter_text_paragraphs(file_path):
+            lines = []
+            for line in paragraph.splitlines(True):
+                if _FENCE.match(line):
+                    in_code = not in_code
+                elif in_code or not line.strip():
+                    lines.append(line)
+                elif not _RULE.match(line) and not _LINK_DEFINITION.match(line):
+                    lines.append(markdown_line_to_text(line.rstrip('\r\n')) + "\n")
+            if lines:
+                yield 'paragraph', "".join(lines)
@@ -0,0 +1,86 @@
+# PDF backend: one chunk per page, OCR for pages without a text layer
+from concurrent.futures import ProcessPoolExecutor
+
+from utils.formats import ExtractorBackend, INLINE, PROCESS_POOL, register_backend
+from utils.metrics import METRICS
+
+def _extract_pdf_pages(file_path, start, stop):
+    """Return the text layer of pages [start, stop) using a private fitz handle
+    
+    Runs inside a worker process, so it must stay at module level. Pages
+    without a text layer come back empty; the parent sends them to OCR.
+    """
+    import fitz  # PyMuPDF
+    
+    with fitz.open(file_path) as doc:
+        return [doc[number].get_text() for number in range(start, stop)]
+
+@register_backend
+class PdfBackend(ExtractorBackend):
+    name = 'pdf'
+    label = 'PDF'
+    mime_types = ('application/pdf',)
+    extensions = ('.pdf',)
+    layout_text = True
+    
+    def count_chunks(self, file_path):
+        import fitz  # PyMuPDF
+        try:
+            with fitz.open(file_path) as doc:
+                return doc.page_count
+        except Exception:
+            return None
+    
+    def estimate_cost(self, file_path):
+        """Documents with many pages are worth spreading over worker processes"""
+        if self.extractor.pdf_workers <= 1:
+            return INLINE
+        page_count = self.count_chunks(file_path) or 0
+        return PROCESS_POOL if page_count >= self.extractor.PARALLEL_PDF_MIN_PAGES else INLINE
+    
+    def _iter_parts(self, file_path, route):
+        """Yield ('page', text) for each PDF page"""
+        if route == PROCESS_POOL:
+            yield from self._iter_pages(file_path, enumerate(self._iter_parallel(file_path)))
+            return
+        
+        import fitz  # PyMuPDF
+        with fitz.open(file_path) as doc:
+            yield from self._iter_pages(file_path, ((page.number, page.get_text()) for page in doc))
+    
+    def _iter_pages(self, file_path, pages):
+        """Yield ('page', text) for (page_number, text layer) pairs, OCR'ing empty pages
+        
+        Both routes go through the same OCR pipeline, so scanned pages are
+        read with the extractor's dpi and threshold and stream out one by one.
+        """
+        if self.extractor.ocr_pdf:
+            texts = self.extractor.ocr.fill_pdf_pages(file_path, pages)
+        else:
+            texts = (text for _, text in pages)
+        for text in texts:
+            yield 'page', text
+    
+    def _iter_parallel(self, file_path):
+        """Extract text layers in page batches across worker processes, yielding pages in order
+        
+        OCR is left to the caller: a batch that had to OCR its scanned pages
+        would hold back every page in it until the slowest was recognised.
+        """
+        page_count = self.count_chunks(file_path) or 0
+        batch = self.extractor.PARALLEL_PDF_BATCH_PAGES
+        workers = max(1, min(self.extractor.pdf_workers, (page_count + batch - 1) // batch))
+        
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_extract_pdf_pages, file_path, start, min(start + batch, page_count))
+                       for start in range(0, page_count, batch)]
+            try:
+                for future in futures:
+                    # Time the consumer waits on the pool for a batch of pages
+                    with METRICS.timer('extract.pdf.batch_wait'):
+                        texts = future.result()
+                    yield from texts
+            finally:
+                # Stop queued batches if the consumer goes away early
+                for future in futures:
+                    future.cancel()
@@ -0,0 +1,74 @@
+# Plain text backend: one chunk per blank-line separated block
+import codecs
+import io
+import mmap
+import os
+import re
+
+from utils.formats import ExtractorBackend, register_backend
+from utils.text_encoding import SAMPLE_BYTES, detect_encoding
+
+# Bytes decoded at a time from the memory-mapped file
+READ_BLOCK_BYTES = 1024 * 1024
+# Paragraphs longer than this (logs, transcripts without blank lines) are
+# split at the last line break before the limit, so memory stays bounded
+MAX_PARAGRAPH_CHARS = 64 * 1024
+
+# A whitespace-only line ends the paragraph above it
+_BLANK_LINE = re.compile(r'^[^\S\n]*\n', re.M)
+
+def _split_paragraphs(text, final):
+    """Split decoded text into whole paragraphs and the unfinished rest"""
+    paragraphs = []
+    start = 0
+    for match in _BLANK_LINE.finditer(text):
+        paragraphs.append(text[start:match.end()])
+        start = match.end()
+    rest = text[start:]
+    
+    while len(rest) > MAX_PARAGRAPH_CHARS:
+        cut = rest.rfind('\n', 0, MAX_PARAGRAPH_CHARS) + 1 or MAX_PARAGRAPH_CHARS
+        paragraphs.append(rest[:cut])
+        rest = rest[cut:]
+    if final and rest:
+        paragraphs.append(rest)
+        rest = ""
+    return paragraphs, rest
+
+def iter_text_paragraphs(file_path):
+    """Yield the blank-line separated blocks of a text file, trailing blank line included
+    
+    The file is memory-mapped and decoded a block at a time, so only a
+    block and one paragraph are held in memory. The encoding is guessed
+    from the start of the file; bytes that do not fit it further on are
+    replaced rather than failing half way through. Line endings are
+    translated to \\n.
+    """
+    if os.path.getsize(file_path) == 0:
+        return
+    
+    with open(file_path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        encoding, position = detect_encoding(data[:SAMPLE_BYTES])
+        decoder = io.IncrementalNewlineDecoder(
+            codecs.getincrementaldecoder(encoding)(errors='replace'), translate=True)
+        
+        rest = ""
+        while position < len(data):
+            block = data[position:position + READ_BLOCK_BYTES]
+            position += len(block)
+            paragraphs, rest = _split_paragraphs(rest + decoder.decode(block), final=False)
+            yield from paragraphs
+        paragraphs, rest = _split_paragraphs(rest + decoder.decode(b"", final=True), final=True)
+        yield from paragraphs
+
+@register_backend
+class PlainTextBackend(ExtractorBackend):
+    name = 'txt'
+    label = 'TXT'
+    mime_types = ('text/plain',)
+    extensions = ('.txt', '.text', '.log')
+    
+    def _iter_parts(self, file_path, route):
+        """Yield ('paragraph', text) for each blank-line separated block"""
+        for paragraph in iter_text_paragraphs(file_path):
+            yield 'paragraph', paragraph
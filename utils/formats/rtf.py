@@ -0,0 +1,113 @@
+# Rich Text Format backend: one chunk per paragraph
+import re
+
+from utils.formats import ExtractorBackend, register_backend
+
+_TOKEN = re.compile(r"\\([a-zA-Z]+)(-?\d+)? ?|\\'([0-9a-fA-F]{2})|\\([^a-zA-Z])|([{}])|[\r\n]+|([^\\{}\r\n]+)")
+
+# Groups starting with these control words hold no readable text
+_SKIPPED_DESTINATIONS = {
+    'fonttbl', 'colortbl', 'stylesheet', 'info', 'pict', 'object', 'themedata',
+    'datastore', 'listtable', 'listoverridetable', 'rsidtbl', 'xmlnstbl',
+    'latentstyles', 'generator', 'filetbl', 'revtbl', 'header', 'headerl',
+    'headerr', 'headerf', 'footer', 'footerl', 'footerr', 'footerf', 'footnote',
+}
+_CHARACTERS = {
+    'line': '\n', 'tab': '\t', 'cell': '\t', 'emdash': '\u2014', 'endash': '\u2013',
+    'bullet': '\u2022', 'lquote': '\u2018', 'rquote': '\u2019',
+    'ldblquote': '\u201c', 'rdblquote': '\u201d', 'emspace': ' ', 'enspace': ' ',
+}
+_SYMBOLS = {'\\': '\\', '{': '{', '}': '}', '~': '\u00a0', '_': '-', '-': ''}
+
+def iter_rtf_paragraphs(content):
+    """Yield the text of each paragraph of an RTF document given as a str"""
+    codepage = 'cp1252'
+    stack = []  # (skipping, unicode fallback length) of the enclosing groups
+    skipping = False
+    fallback_length = 1
+    pending_skip = 0  # Fallback characters still to drop after a \u
+    paragraph = []
+    raw_bytes = bytearray()  # \'hh escapes, decoded together with the codepage
+    
+    def flush_bytes():
+        if raw_bytes:
+            try:
+                paragraph.append(raw_bytes.decode(codepage, errors='replace'))
+            except LookupError:
+                paragraph.append(raw_bytes.decode('cp1252', errors='replace'))
+            raw_bytes.clear()
+    
+    group_start = False
+    for match in _TOKEN.finditer(content):
+        word, parameter, hex_byte, symbol, brace, text = match.groups()
+        starts_group = group_start
+        group_start = False
+        
+        if brace == '{':
+            stack.append((skipping, fallback_length))
+            group_start = True
+            continue
+        if brace == '}':
+            flush_bytes()
+            if stack:
+                skipping, fallback_length = stack.pop()
+            continue
+        if symbol == '*' and starts_group:
+            # Ignorable destination the reader does not understand
+            skipping = True
+            continue
+        
+        if hex_byte is not None:
+            if pending_skip:
+                pending_skip -= 1
+            elif not skipping:
+                raw_bytes.append(int(hex_byte, 16))
+            continue
+        flush_bytes()
+        
+        if word is not None:
+            if starts_group and word in _SKIPPED_DESTINATIONS:
+                skipping = True
+            elif word == 'ansicpg' and parameter:
+                codepage = f"cp{parameter}"
+            elif word == 'uc' and parameter:
+                fallback_length = int(parameter)
+            elif skipping:
+                pass
+            elif word == 'u' and parameter:
+                paragraph.append(chr(int(parameter) % 65536))
+                pending_skip = fallback_length
+            elif word in ('par', 'row', 'sect', 'page'):
+                yield "".join(paragraph) + "\n"
+                paragraph = []
+            elif word in _CHARACTERS:
+                paragraph.append(_CHARACTERS[word])
+        elif symbol is not None:
+            if not skipping and symbol in _SYMBOLS:
+                paragraph.append(_SYMBOLS[symbol])
+        elif text is not None:
+            if pending_skip:
+                dropped = min(pending_skip, len(text))
+                pending_skip -= dropped
+                text = text[dropped:]
+            if not skipping:
+                paragraph.append(text)
+    
+    flush_bytes()
+    if paragraph:
+        yield "".join(paragraph) + "\n"
+
+@register_backend
+class RtfBackend(ExtractorBackend):
+    name = 'rtf'
+    label = 'RTF'
+    mime_types = ('text/rtf', 'application/rtf')
+    extensions = ('.rtf',)
+    
+    def _iter_parts(self, file_path, route):
+        """Yield ('paragraph', text) for each RTF paragraph"""
+        # RTF is 7-bit; anything else is written as \' or \u escapes
+        with open(file_path, 'r', encoding='latin-1') as file:
+            content = file.read()
+        for paragraph in iter_rtf_paragraphs(content):
+            yield 'paragraph', paragraph
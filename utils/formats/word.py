@@ -0,0 +1,95 @@
+# Word (.docx) backend: one chunk per paragraph or table cell
+import zipfile
+import xml.etree.ElementTree as ElementTree
+
+from utils.formats import ExtractorBackend, register_backend
+
+W_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+MC_NS = '{http://schemas.openxmlformats.org/markup-compatibility/2006}'
+
+_PARAGRAPH = W_NS + 'p'
+# Paragraphs inside these are read together as one chunk
+_CONTAINERS = (W_NS + 'tc', W_NS + 'txbxContent')
+# Properties hold no readable text (their w:tab elements are tab stops), and
+# text boxes are stored a second time as a fallback for older readers
+_SKIPPED = (W_NS + 'pPr', W_NS + 'rPr', W_NS + 'tblPr', W_NS + 'trPr', W_NS + 'tcPr',
+            W_NS + 'sectPr', MC_NS + 'Fallback')
+# Run content other than w:t; deleted text (w:delText) and field codes
+# (w:instrText) are left out
+_RUN_TEXT = {
+    W_NS + 'tab': '\t',
+    W_NS + 'br': '\n',
+    W_NS + 'cr': '\n',
+    W_NS + 'noBreakHyphen': '-',
+}
+
+def iter_docx_blocks(file_path):
+    """Yield the text of each paragraph and table cell of a .docx file, in document order
+    
+    word/document.xml is parsed incrementally and finished body elements
+    are cleared, so memory does not grow with the document. A table cell
+    (including any table nested in it) becomes one block with a line per
+    paragraph; a text box follows the paragraph it is anchored to. Empty
+    cells are skipped, empty body paragraphs give empty blocks.
+    """
+    with zipfile.ZipFile(file_path) as archive, archive.open('word/document.xml') as document:
+        body = None
+        depth = 0  # Open elements
+        skipping = 0  # Open elements inside a skipped one
+        # Open paragraphs and containers, innermost last, as
+        # [tag, pieces, text boxes waiting for the paragraph to end]
+        stack = []
+        for event, element in ElementTree.iterparse(document, events=('start', 'end')):
+            tag = element.tag
+            if event == 'start':
+                depth += 1
+                if skipping or tag in _SKIPPED:
+                    skipping += 1
+                elif tag == _PARAGRAPH or tag in _CONTAINERS:
+                    stack.append([tag, [], []])
+                elif tag == W_NS + 'body':
+                    body = element
+                continue
+            
+            depth -= 1
+            if skipping:
+                skipping -= 1
+            elif tag == W_NS + 't':
+                if stack and element.text:
+                    stack[-1][1].append(element.text)
+            elif tag in _RUN_TEXT:
+                if stack:
+                    stack[-1][1].append(_RUN_TEXT[tag])
+            elif tag == _PARAGRAPH or tag in _CONTAINERS:
+                _, pieces, text_boxes = stack.pop()
+                if tag == _PARAGRAPH:
+                    blocks = ["".join(pieces)] + text_boxes
+                else:
+                    text = "\n".join(piece for piece in pieces if piece)
+                    blocks = [text] if text else []
+                element.clear()
+                
+                for text in blocks:
+                    if not stack:
+                        yield text
+                    elif stack[-1][0] == _PARAGRAPH:
+                        # A text box ended inside its anchor paragraph
+                        stack[-1][2].append(text)
+                    else:
+                        stack[-1][1].append(text)
+            
+            if depth == 2 and body is not None:
+                # A child of w:body is finished; drop it from the tree
+                body.clear()
+
+@register_backend
+class DocxBackend(ExtractorBackend):
+    name = 'docx'
+    label = 'DOCX'
+    mime_types = ('application/vnd.openxmlformats-officedocument.wordprocessingml.document',)
+    extensions = ('.docx',)
+    
+    def _iter_parts(self, file_path, route):
+        """Yield ('paragraph', text) for each paragraph and table cell"""
+        for text in iter_docx_blocks(file_path):
+            yield 'paragraph', text + "\n"
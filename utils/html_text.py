@@ -0,0 +1,101 @@
+# Readable text from HTML and XHTML markup
+import re
+from html.parser import HTMLParser
+
+# Markup is fed to the HTML parser in pieces of this many characters
+FEED_SIZE = 64 * 1024
+
+# Tags that start a new block of text
+BLOCK_TAGS = {
+    'address', 'article', 'aside', 'blockquote', 'br', 'dd', 'div', 'dl', 'dt',
+    'figcaption', 'figure', 'footer', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+    'header', 'hr', 'li', 'nav', 'ol', 'p', 'pre', 'section', 'table', 'td',
+    'th', 'tr', 'ul',
+}
+# Tags whose content is never read
+SKIP_TAGS = {'head', 'script', 'style', 'svg', 'math', 'template', 'noscript'}
+
+_WHITESPACE = re.compile(r'\s+')
+_DECLARED_ENCODING = re.compile(
+    rb'<\?xml[^>]*encoding=["\']([A-Za-z0-9._-]+)["\']|<meta[^>]*charset=["\']?([A-Za-z0-9._-]+)', re.I)
+
+class BlockTextParser(HTMLParser):
+    """Collects the readable text of an (X)HTML document block by block
+    
+    Text inside a block is joined with single spaces; finished blocks are
+    collected in `blocks` for the caller to take. Scripts, styles and the
+    document head are skipped.
+    """
+    
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.blocks = []
+        self._line = []
+        self._skip_depth = 0
+    
+    def _end_block(self):
+        if self._line:
+            line = _WHITESPACE.sub(' ', "".join(self._line)).strip()
+            if line:
+                self.blocks.append(line)
+            self._line = []
+    
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag in BLOCK_TAGS:
+            self._end_block()
+    
+    def handle_startendtag(self, tag, attrs):
+        if tag in BLOCK_TAGS:
+            self._end_block()
+    
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag in BLOCK_TAGS:
+            self._end_block()
+    
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self._line.append(data)
+    
+    def close(self):
+        super().close()
+        self._end_block()
+    
+    def take_blocks(self):
+        """Return the blocks finished so far and forget them"""
+        blocks, self.blocks = self.blocks, []
+        return blocks
+
+def decode_markup(content):
+    """Decode HTML bytes using the BOM or the declared encoding, utf-8 otherwise"""
+    if content.startswith(b'\xef\xbb\xbf'):
+        return content[3:].decode('utf-8', errors='replace')
+    if content.startswith((b'\xff\xfe', b'\xfe\xff')):
+        return content.decode('utf-16', errors='replace')
+    
+    match = _DECLARED_ENCODING.search(content[:1024])
+    encoding = (match.group(1) or match.group(2)).decode('ascii') if match else 'utf-8'
+    try:
+        return content.decode(encoding, errors='replace')
+    except LookupError:
+        return content.decode('utf-8', errors='replace')
+
+def iter_blocks(markup):
+    """Yield the text of each block of an HTML string as it is parsed"""
+    parser = BlockTextParser()
+    for start in range(0, len(markup), FEED_SIZE):
+        parser.feed(markup[start:start + FEED_SIZE])
+        yield from parser.take_blocks()
+    parser.close()
+    yield from parser.take_blocks()
+
+def html_to_text(content):
+    """Readable text of an (X)HTML document given as bytes
+    
+    Blocks are separated by blank lines, so headings and paragraphs stay
+    separate sentences and paragraphs when read.
+    """
+    return "\n\n".join(iter_blocks(decode_markup(content)))
@@ -0,0 +1,210 @@
+# Stage timers, gauges and an opt-in sampling profiler for diagnosing slow
+# loading and stuttering speech
+import atexit
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+log = logging.getLogger('readaloud.metrics')
+
+# Set to 1 to log every timing as a JSON line on stderr
+DEBUG_ENV = 'READALOUD_DEBUG'
+# Set to a file path to profile the whole session and write the collapsed
+# stacks there on exit (flamegraph.pl and speedscope read the format)
+PROFILE_ENV = 'READALOUD_PROFILE'
+
+class Stat:
+    """Running count, total, maximum and last value of one timer"""
+    
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last = 0.0
+    
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.last = seconds
+        if seconds > self.max:
+            self.max = seconds
+    
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'total_ms': round(self.total * 1000, 3),
+            'mean_ms': round(self.total * 1000 / self.count, 3) if self.count else 0.0,
+            'max_ms': round(self.max * 1000, 3),
+            'last_ms': round(self.last * 1000, 3),
+        }
+
+class Metrics:
+    """Thread-safe registry of named timers and gauges
+    
+    Names are dotted, stage first ('extract.parse.pdf', 'tts.command.seek').
+    Recording costs a lock and a few additions, cheap enough to leave on in
+    release builds; each timing is also logged as a JSON line when the
+    'readaloud.metrics' logger is at DEBUG level.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._timers = {}
+        self._gauges = {}
+    
+    def record(self, name, seconds, **fields):
+        """Add one duration (in seconds) to a timer"""
+        with self._lock:
+            stat = self._timers.get(name)
+            if stat is None:
+                stat = self._timers[name] = Stat()
+            stat.add(seconds)
+        if log.isEnabledFor(logging.DEBUG):
+            log_event(name, ms=round(seconds * 1000, 3), **fields)
+    
+    def gauge(self, name, value):
+        """Set the current value of a gauge, such as a queue depth"""
+        with self._lock:
+            self._gauges[name] = value
+    
+    @contextmanager
+    def timer(self, name, **fields):
+        """Time the body of a with block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start, **fields)
+    
+    def timed_iter(self, name, iterable):
+        """Yield from iterable, timing how long each item takes to produce
+        
+        Only the time spent inside the iterable counts; time the consumer
+        spends between items does not.
+        """
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            self.record(name, time.perf_counter() - start)
+            yield item
+    
+    def snapshot(self):
+        """{'timers': {name: stats}, 'gauges': {name: value}} as plain data"""
+        with self._lock:
+            return {
+                'timers': {name: stat.as_dict() for name, stat in sorted(self._timers.items())},
+                'gauges': dict(sorted(self._gauges.items())),
+            }
+    
+    def reset(self):
+        with self._lock:
+            self._timers.clear()
+            self._gauges.clear()
+
+# The process-wide registry
+METRICS = Metrics()
+
+def log_event(event, **fields):
+    """Log a structured event as one JSON line at DEBUG level"""
+    if log.isEnabledFor(logging.DEBUG):
+        fields['event'] = event
+        fields['thread'] = threading.current_thread().name
+        log.debug(json.dumps(fields, default=str))
+
+class SamplingProfiler:
+    """Samples the Python stacks of every thread at a fixed interval
+    
+    Unlike cProfile, which only sees the thread that enabled it, this covers
+    the extraction and speech worker threads as well, and its overhead does
+    not grow with the number of function calls. Worker processes are not
+    sampled.
+    """
+    
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.samples = 0
+        self._stacks = Counter()  # Collapsed stack -> samples
+        self._stop = threading.Event()
+        self._thread = None
+    
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+    
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler')
+        self._thread.daemon = True
+        self._thread.start()
+    
+    def stop(self):
+        if self.running:
+            self._stop.set()
+            self._thread.join()
+    
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self._stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+    
+    def top(self, limit=20):
+        """[(function, self samples, inclusive samples)] by self samples, highest first"""
+        own = Counter()
+        inclusive = Counter()
+        for stack, count in list(self._stacks.items()):
+            frames = stack.split(";")[1:]
+            if not frames:
+                continue
+            own[frames[-1]] += count
+            for frame in set(frames):
+                inclusive[frame] += count
+        return [(function, count, inclusive[function]) for function, count in own.most_common(limit)]
+    
+    def write_collapsed(self, path):
+        """Write 'thread;outer;...;inner samples' lines for flame graph tools"""
+        with open(path, 'w', encoding='utf-8') as file:
+            for stack, count in sorted(self._stacks.items()):
+                file.write(f"{stack} {count}\n")
+
+def configure_from_environment():
+    """Apply READALOUD_DEBUG and READALOUD_PROFILE; returns the profiler if started"""
+    if os.environ.get(DEBUG_ENV):
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter('%(asctime)s %(name)s %(levelname)s %(message)s'))
+        logger = logging.getLogger('readaloud')
+        logger.addHandler(handler)
+        logger.setLevel(logging.DEBUG)
+    
+    path = os.environ.get(PROFILE_ENV)
+    if not path:
+        return None
+    profiler = SamplingProfiler()
+    profiler.start()
+    
+    def write_profile():
+        profiler.stop()
+        profiler.write_collapsed(path)
+    atexit.register(write_profile)
+    return profiler
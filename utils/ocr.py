@@ -0,0 +1,180 @@
+# OCR pipeline for images and scanned PDF pages
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from utils.metrics import METRICS
+
+# PyMuPDF, pytesseract and Pillow are imported where they are used so that
+# loading the extractor does not pull in the OCR stack
+
+# Render scanned PDF pages at this resolution; tesseract is tuned for ~300 dpi
+DEFAULT_DPI = 300
+# Grey level above which a pixel becomes white when binarizing
+DEFAULT_THRESHOLD = 160
+# Images narrower than this are upscaled before OCR
+MIN_OCR_WIDTH = 1600
+# Images taller than this are split into horizontal bands OCR'd in parallel
+TILE_MIN_HEIGHT = 4000
+TILE_HEIGHT = 1500
+
+def preprocess_image(image, threshold=DEFAULT_THRESHOLD):
+    """Greyscale, upscale small images and binarize for tesseract"""
+    from PIL import Image
+    
+    image = image.convert('L')
+    if image.width < MIN_OCR_WIDTH:
+        scale = min(2.0, MIN_OCR_WIDTH / image.width)
+        image = image.resize((int(image.width * scale), int(image.height * scale)), Image.LANCZOS)
+    table = [255 if level > threshold else 0 for level in range(256)]
+    return image.point(table)
+
+def ocr_image(image):
+    """Run tesseract on an already preprocessed image"""
+    import pytesseract
+    # Only timings taken in this process show up; calls in the pool are
+    # covered by 'ocr.wait' instead
+    with METRICS.timer('ocr.tesseract'):
+        return pytesseract.image_to_string(image)
+
+def _ocr_band(mode, size, data):
+    """OCR one band of an image; runs in a worker process"""
+    import pytesseract
+    from PIL import Image
+    
+    try:
+        return ocr_image(Image.frombytes(mode, size, data))
+    except pytesseract.TesseractNotFoundError as e:
+        # The pytesseract exception cannot be unpickled in the parent process
+        raise RuntimeError(str(e))
+
+def _ocr_pdf_page(file_path, page_number, dpi, threshold):
+    """Rasterize one PDF page and OCR it; runs in a worker process"""
+    import fitz  # PyMuPDF
+    with fitz.open(file_path) as doc:
+        return ocr_pdf_page(doc[page_number], dpi, threshold)
+
+def ocr_pdf_page(page, dpi=DEFAULT_DPI, threshold=DEFAULT_THRESHOLD):
+    """OCR a fitz page that has no text layer
+    
+    Returns an empty string for pages without images or when tesseract is
+    not installed, matching what the text layer would have produced.
+    """
+    if not page.get_images():
+        return ""
+    import fitz  # PyMuPDF
+    import pytesseract
+    from PIL import Image
+    
+    with METRICS.timer('ocr.rasterize'):
+        pixmap = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY)
+        image = Image.frombytes('L', (pixmap.width, pixmap.height), pixmap.samples)
+    try:
+        return ocr_image(preprocess_image(image, threshold))
+    except pytesseract.TesseractNotFoundError:
+        return ""
+
+def band_boundaries(image, tile_height=TILE_HEIGHT):
+    """Split points for cutting a binarized image into horizontal bands
+    
+    Each cut is moved to the nearest all-white row so that no line of text
+    is sliced in half.
+    """
+    width, height = image.size
+    data = image.tobytes()
+    
+    def is_blank(row):
+        line = data[row * width:(row + 1) * width]
+        return line.count(255) == width
+    
+    cuts = [0]
+    nominal = tile_height
+    while nominal < height - tile_height // 2:
+        cut = None
+        for delta in range(tile_height // 3):
+            for row in (nominal - delta, nominal + delta):
+                if cuts[-1] < row < height and is_blank(row):
+                    cut = row
+                    break
+            if cut is not None:
+                break
+        if cut is not None:
+            cuts.append(cut)
+        nominal = (cut or nominal) + tile_height
+    cuts.append(height)
+    return list(zip(cuts, cuts[1:]))
+
+class OCRPipeline:
+    """Fans tesseract calls out over a process pool and streams results in order"""
+    
+    def __init__(self, workers=None, dpi=DEFAULT_DPI, threshold=DEFAULT_THRESHOLD):
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+        self.dpi = dpi
+        self.threshold = threshold
+    
+    def iter_image_text(self, image, parallel=True):
+        """Yield OCR text for an image, band by band from top to bottom
+        
+        Tall images are split across the pool unless parallel is False.
+        """
+        with METRICS.timer('ocr.preprocess'):
+            image = preprocess_image(image, self.threshold)
+        if not parallel or self.workers <= 1 or image.height < TILE_MIN_HEIGHT:
+            yield ocr_image(image)
+            return
+        
+        bands = band_boundaries(image)
+        with ProcessPoolExecutor(max_workers=min(self.workers, len(bands))) as pool:
+            futures = []
+            for top, bottom in bands:
+                band = image.crop((0, top, image.width, bottom))
+                futures.append(pool.submit(_ocr_band, band.mode, band.size, band.tobytes()))
+            for future in futures:
+                with METRICS.timer('ocr.wait'):
+                    text = future.result()
+                yield text
+    
+    def fill_pdf_pages(self, file_path, pages):
+        """Yield page texts in order, OCR'ing pages whose text layer is empty
+        
+        pages yields (page_number, text) in order. Blank pages are sent to the
+        pool while later pages keep streaming; at most a few pages per worker
+        are held back waiting for OCR.
+        """
+        if self.workers <= 1:
+            import fitz  # PyMuPDF
+            with fitz.open(file_path) as doc:
+                for page_number, text in pages:
+                    if not text.strip():
+                        text = ocr_pdf_page(doc[page_number], self.dpi, self.threshold) or text
+                    yield text
+            return
+        
+        lookahead = self.workers * 4
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            pending = deque()
+            try:
+                for page_number, text in pages:
+                    if text.strip():
+                        pending.append(text)
+                    else:
+                        pending.append((text, pool.submit(_ocr_pdf_page, file_path, page_number,
+                                                          self.dpi, self.threshold)))
+                    while pending and (len(pending) > lookahead or _is_ready(pending[0])):
+                        yield _resolve(pending.popleft())
+                while pending:
+                    yield _resolve(pending.popleft())
+            finally:
+                for item in pending:
+                    if isinstance(item, tuple):
+                        item[1].cancel()
+
+def _is_ready(item):
+    return not isinstance(item, tuple) or item[1].done()
+
+def _resolve(item):
+    if not isinstance(item, tuple):
+        return item
+    text, future = item
+    with METRICS.timer('ocr.wait'):
+        return future.result() or text
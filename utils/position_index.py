@@ -0,0 +1,179 @@
+# Word, sentence, paragraph and page boundaries with estimated speech times
+import re
+from array import array
+from bisect import bisect_right
+
+from utils.text_segmenter import iter_sentences
+
+_WORD = re.compile(r'\S+')
+_PARAGRAPH_BREAK = re.compile(r'\n[ \t]*\n\s*')
+
+# Estimated speaking time is counted in "word units": one per word plus a
+# short pause after each sentence. Units become seconds through the speech
+# rate and a calibration factor measured from the engine's word callbacks.
+SENTENCE_PAUSE_UNITS = 0.5
+
+class PositionIndex:
+    """Boundary index over a document for O(log n) seeking
+    
+    Boundaries are kept in compact arrays sorted by character offset, so
+    converting between positions and times, or stepping by sentence,
+    paragraph or page, is a bisect. The index is built incrementally as
+    text is appended.
+    """
+    
+    LEVELS = ('word', 'sentence', 'paragraph', 'page')
+    
+    def __init__(self):
+        self.word_starts = array('q')
+        self.sentence_starts = array('q')
+        self.sentence_ends = array('q')
+        self.sentence_first_word = array('q')  # Index into word_starts
+        self.sentence_units = array('d')  # Cumulative units at sentence start
+        self.paragraph_starts = array('q', [0])
+        self.page_starts = array('q', [0])
+        self.indexed_length = 0
+        # Measured seconds per estimated second; refined while speaking
+        self.calibration = 1.0
+        self._tail_open = False
+    
+    def clear(self):
+        """Forget the document but keep the calibration, which belongs to the voice"""
+        calibration = self.calibration
+        self.__init__()
+        self.calibration = calibration
+    
+    def add_page(self, offset):
+        """Record the start of a page or chapter"""
+        if offset > self.page_starts[-1]:
+            self.page_starts.append(offset)
+    
+    def extend(self, text, limit=None):
+        """Index text added since the last call
+        
+        With a limit, indexing stops at the first sentence starting at or
+        after that offset, so long documents are indexed a bit at a time
+        just ahead of where they are read. The last sentence may have been
+        cut off by the end of the text so far; it is re-indexed once more
+        text arrives.
+        """
+        start = self.indexed_length
+        if self._tail_open and len(self.sentence_starts):
+            start = self._drop_last_sentence()
+        if len(text) <= start or (limit is not None and limit <= start):
+            return
+        
+        units = self._total_units()
+        end = len(text)
+        for sentence_start, sentence_end in iter_sentences(text, start):
+            if limit is not None and sentence_start >= limit:
+                end = sentence_start
+                break
+            self.sentence_starts.append(sentence_start)
+            self.sentence_ends.append(sentence_end)
+            self.sentence_first_word.append(len(self.word_starts))
+            self.sentence_units.append(units)
+            words = 0
+            for word in _WORD.finditer(text, sentence_start, sentence_end):
+                self.word_starts.append(word.start())
+                words += 1
+            units += words + SENTENCE_PAUSE_UNITS
+        
+        # Rescan a little of the old text in case a break straddles the append
+        for match in _PARAGRAPH_BREAK.finditer(text, max(0, self.indexed_length - 64), end):
+            if match.end() < end and match.end() > self.paragraph_starts[-1]:
+                self.paragraph_starts.append(match.end())
+        
+        self.indexed_length = end
+        self._tail_open = bool(len(self.sentence_ends)) and self.sentence_ends[-1] == len(text)
+    
+    def _drop_last_sentence(self):
+        start = self.sentence_starts.pop()
+        self.sentence_ends.pop()
+        self.sentence_units.pop()
+        first_word = self.sentence_first_word.pop()
+        del self.word_starts[first_word:]
+        return start
+    
+    def _total_units(self):
+        if not len(self.sentence_starts):
+            return 0.0
+        last = len(self.sentence_starts) - 1
+        words = len(self.word_starts) - self.sentence_first_word[last]
+        return self.sentence_units[last] + words + SENTENCE_PAUSE_UNITS
+    
+    def _seconds_per_unit(self, rate):
+        # rate is in words per minute
+        return 60.0 / max(rate, 1) * self.calibration
+    
+    def units_at(self, position):
+        """Estimated word units spoken before reaching position"""
+        sentence = bisect_right(self.sentence_starts, position) - 1
+        if sentence < 0:
+            return 0.0
+        word = bisect_right(self.word_starts, position) - 1
+        return self.sentence_units[sentence] + max(0, word - self.sentence_first_word[sentence])
+    
+    def time_at(self, position, rate):
+        """Estimated seconds from the start of the document to position"""
+        return self.units_at(position) * self._seconds_per_unit(rate)
+    
+    def position_at_time(self, seconds, rate):
+        """Start of the word being spoken at the given time"""
+        if not len(self.sentence_starts):
+            return 0
+        units = max(0.0, seconds / self._seconds_per_unit(rate))
+        sentence = max(0, bisect_right(self.sentence_units, units) - 1)
+        first_word = self.sentence_first_word[sentence]
+        if sentence + 1 < len(self.sentence_first_word):
+            last_word = self.sentence_first_word[sentence + 1] - 1
+        else:
+            last_word = len(self.word_starts) - 1
+        word = min(first_word + int(units - self.sentence_units[sentence]), last_word)
+        if word < first_word:
+            return self.sentence_starts[sentence]
+        return self.word_starts[word]
+    
+    def sentence_at(self, position):
+        """(start, end) of the indexed sentence containing position, or None"""
+        sentence = bisect_right(self.sentence_starts, position) - 1
+        if sentence < 0 or position >= self.sentence_ends[sentence]:
+            return None
+        return self.sentence_starts[sentence], self.sentence_ends[sentence]
+    
+    def _boundaries(self, level):
+        return {
+            'word': self.word_starts,
+            'sentence': self.sentence_starts,
+            'paragraph': self.paragraph_starts,
+            'page': self.page_starts,
+        }[level]
+    
+    def snap(self, position, level='word'):
+        """Closest boundary of the given level at or before position"""
+        boundaries = self._boundaries(level)
+        index = bisect_right(boundaries, position) - 1
+        return boundaries[index] if index >= 0 else 0
+    
+    def step(self, position, level, count):
+        """Boundary `count` units of level away from the one containing position
+        
+        Stepping back by one from the middle of a sentence returns to the
+        start of that sentence, like the previous-track button on a player.
+        """
+        boundaries = self._boundaries(level)
+        if not len(boundaries):
+            return 0
+        index = bisect_right(boundaries, position) - 1
+        if count < 0 and index >= 0 and boundaries[index] < position:
+            count += 1
+        index = max(0, min(len(boundaries) - 1, index + count))
+        return boundaries[index]
+    
+    def calibrate(self, start, end, elapsed, rate):
+        """Blend a measured speaking time for text[start:end] into the estimate"""
+        estimated = (self.units_at(end) - self.units_at(start)) * 60.0 / max(rate, 1)
+        if estimated <= 0 or elapsed <= 0:
+            return
+        ratio = min(3.0, max(0.33, elapsed / estimated))
+        self.calibration = 0.9 * self.calibration + 0.1 * ratio
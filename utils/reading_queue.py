@@ -0,0 +1,115 @@
+# Reading queue: the documents to read in order and where reading stopped in each
+import json
+import os
+
+def default_queue_path():
+    """Return the per-user file the reading queue is saved to"""
+    base = os.environ.get('LOCALAPPDATA') or os.path.join(os.path.expanduser('~'), '.config')
+    return os.path.join(base, 'ReadAloud', 'queue.json')
+
+class ReadingQueue:
+    """An ordered list of documents, the one being read and saved reading positions
+    
+    Positions are kept per document, also for documents that have left the
+    queue, so reopening a book continues where it was left. The state is a
+    small JSON file written with save(); a missing or damaged file gives an
+    empty queue.
+    """
+    
+    # Reading positions remembered; the least recently read are forgotten first
+    MAX_POSITIONS = 500
+    
+    def __init__(self, path=None):
+        self.path = path or default_queue_path()
+        self.documents = []
+        self.current = -1  # Index in documents, -1 when nothing is open
+        self._positions = {}  # File path -> character offset, least recently read first
+        self.load()
+    
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as file:
+                state = json.load(file)
+            documents = [str(path) for path in state.get('documents', [])]
+            positions = {str(path): int(position) for path, position in state.get('positions', {}).items()}
+            current = int(state.get('current', -1))
+        except (OSError, ValueError, TypeError, AttributeError):
+            return
+        self.documents = documents
+        self._positions = positions
+        self.current = current if 0 <= current < len(documents) else -1
+    
+    def save(self):
+        """Write the queue and positions; failures are ignored, the queue is a convenience"""
+        state = {'documents': self.documents, 'current': self.current, 'positions': self._positions}
+        tmp_path = self.path + '.tmp'
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as file:
+                json.dump(state, file, indent=2)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            pass
+    
+    def __len__(self):
+        return len(self.documents)
+    
+    def index_of(self, file_path):
+        """Index of a document in the queue, or -1"""
+        try:
+            return self.documents.index(os.path.abspath(file_path))
+        except ValueError:
+            return -1
+    
+    def add(self, file_path, index=None):
+        """Insert a document (at the end by default); returns its index
+        
+        A document already in the queue stays where it is.
+        """
+        existing = self.index_of(file_path)
+        if existing >= 0:
+            return existing
+        if index is None or not 0 <= index <= len(self.documents):
+            index = len(self.documents)
+        self.documents.insert(index, os.path.abspath(file_path))
+        if index <= self.current:
+            self.current += 1
+        return index
+    
+    def remove(self, index):
+        del self.documents[index]
+        if index < self.current:
+            self.current -= 1
+        elif index == self.current:
+            self.current = -1
+    
+    def move(self, index, offset):
+        """Move a document up (negative offset) or down the queue; returns its new index"""
+        target = max(0, min(len(self.documents) - 1, index + offset))
+        if target == index:
+            return index
+        current_path = self.current_path()
+        self.documents.insert(target, self.documents.pop(index))
+        if current_path is not None:
+            self.current = self.documents.index(current_path)
+        return target
+    
+    def current_path(self):
+        return self.documents[self.current] if 0 <= self.current < len(self.documents) else None
+    
+    def next_path(self):
+        """The document after the current one, or None at the end of the queue"""
+        index = self.current + 1
+        return self.documents[index] if 0 <= index < len(self.documents) else None
+    
+    def position(self, file_path):
+        """Saved reading position of a document, 0 if it has none"""
+        return self._positions.get(os.path.abspath(file_path), 0)
+    
+    def set_position(self, file_path, position):
+        path = os.path.abspath(file_path)
+        self._positions.pop(path, None)
+        if position > 0:
+            self._positions[path] = position
+            while len(self._positions) > self.MAX_POSITIONS:
+                del self._positions[next(iter(self._positions))]
@@ -0,0 +1,98 @@
+# Inverted index over the extracted text for instant full-text search
+import re
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+
+_TERM = re.compile(r'\w+')
+
+def search_terms(text):
+    """Case-folded words of text, as they are indexed"""
+    return [match.group().casefold() for match in _TERM.finditer(text)]
+
+def _contains(postings, ordinal):
+    index = bisect_left(postings, ordinal)
+    return index < len(postings) and postings[index] == ordinal
+
+class SearchHit:
+    """A match: its character span in the document and the chunk it is in"""
+    def __init__(self, offset, length, chunk_index):
+        self.offset = offset
+        self.length = length
+        self.chunk_index = chunk_index  # Page, paragraph or chapter number (0-based)
+    
+    @property
+    def end(self):
+        return self.offset + self.length
+
+class SearchIndex:
+    """Maps every word of a document to where it occurs, built chunk by chunk
+    
+    Postings hold word numbers rather than character offsets, so a phrase
+    is found by checking that its words follow each other; word_offsets
+    turns word numbers back into offsets. Chunks are added from the
+    extraction thread while the GUI searches, so both go through a lock.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._postings = {}  # term -> array of word numbers, ascending
+        self.word_offsets = array('q')
+        self.word_lengths = array('i')
+        self.chunk_starts = array('q')
+        self.indexed_length = 0
+    
+    def add_chunk(self, text, offset):
+        """Index a chunk that starts at a character offset in the document
+        
+        Chunks must be added in document order.
+        """
+        postings = self._postings
+        with self._lock:
+            self.chunk_starts.append(offset)
+            ordinal = len(self.word_offsets)
+            for match in _TERM.finditer(text):
+                term = match.group().casefold()
+                term_postings = postings.get(term)
+                if term_postings is None:
+                    term_postings = postings[term] = array('i')
+                term_postings.append(ordinal)
+                self.word_offsets.append(offset + match.start())
+                self.word_lengths.append(match.end() - match.start())
+                ordinal += 1
+            self.indexed_length = offset + len(text)
+    
+    def term_count(self):
+        return len(self._postings)
+    
+    def search(self, query, limit=200):
+        """Return up to limit SearchHits for the words of query as a phrase, in document order
+        
+        Matching ignores case and punctuation: "Chapter 3" finds "chapter
+        3:" as well. The rarest word's postings are walked and the other
+        words are looked up by bisection, so common words cost little when
+        they appear next to a rare one.
+        """
+        terms = search_terms(query)
+        if not terms:
+            return []
+        
+        with self._lock:
+            lists = [self._postings.get(term) for term in terms]
+            if any(postings is None for postings in lists):
+                return []
+            rarest = min(range(len(terms)), key=lambda index: len(lists[index]))
+            others = [(index, postings) for index, postings in enumerate(lists) if index != rarest]
+            
+            hits = []
+            for ordinal in lists[rarest]:
+                first = ordinal - rarest
+                if first < 0 or not all(_contains(postings, first + index) for index, postings in others):
+                    continue
+                last = first + len(terms) - 1
+                start = self.word_offsets[first]
+                end = self.word_offsets[last] + self.word_lengths[last]
+                hits.append(SearchHit(start, end - start, bisect_right(self.chunk_starts, start) - 1))
+                if len(hits) >= limit:
+                    break
+            return hits
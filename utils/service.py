@@ -0,0 +1,389 @@
+# Local HTTP service that turns documents and text into streamed speech
+import asyncio
+import codecs
+import io
+import json
+import logging
+import os
+import struct
+import tempfile
+import time
+import wave
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+from utils.audio_pipeline import init_render_engine, render_to_wav
+from utils.metrics import METRICS
+from utils.text_extractor import TextExtractor
+from utils.text_segmenter import iter_sentences
+
+log = logging.getLogger('readaloud.service')
+
+# Requests larger than this are refused with 413
+MAX_BODY_BYTES = 256 * 1024 * 1024
+# Uploads are copied to disk, and request text decoded, this much at a time
+READ_BLOCK_BYTES = 256 * 1024
+# Sentences are synthesized in groups of about this many characters; each
+# engine call has a fixed cost, but long groups delay the first audio
+SEGMENT_CHARS = 800
+# The first segment of a request is kept short so audio starts quickly
+FIRST_SEGMENT_CHARS = 200
+# Segments of one request being synthesized (or waiting to be sent) at once
+LOOKAHEAD = 3
+
+_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+            411: 'Length Required', 413: 'Payload Too Large', 500: 'Internal Server Error',
+            503: 'Service Unavailable'}
+
+class HTTPError(Exception):
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+def _warm_up():
+    """Runs once per worker process so its speech engine exists before the first request"""
+    return os.getpid()
+
+def streaming_wav_header(channels, sample_width, frame_rate):
+    """RIFF header for a WAV stream of unknown length
+    
+    The size fields hold 0xFFFFFFFF, which players and ffmpeg read as
+    "until the end of the stream".
+    """
+    block_align = channels * sample_width
+    return (b'RIFF' + struct.pack('<I', 0xFFFFFFFF) + b'WAVE'
+            + b'fmt ' + struct.pack('<IHHIIHH', 16, 1, channels, frame_rate,
+                                    frame_rate * block_align, block_align, sample_width * 8)
+            + b'data' + struct.pack('<I', 0xFFFFFFFF))
+
+def wav_frames(data):
+    """((channels, sample width, frame rate), PCM frames) of a WAV buffer"""
+    with wave.open(io.BytesIO(data), 'rb') as wav:
+        params = (wav.getnchannels(), wav.getsampwidth(), wav.getframerate())
+        return params, wav.readframes(wav.getnframes())
+
+class SpeechService:
+    """Accepts documents or text over HTTP and streams back WAV audio
+    
+    POST /speak with a document (any format TextExtractor reads) or with
+    Content-Type text/plain; the optional query parameters rate, volume and
+    voice set the speech properties and name gives the document's file name.
+    The answer is a single WAV stream sent with chunked encoding as
+    segments are synthesized. GET /status reports the load and the metrics.
+    
+    Extraction runs in a thread pool and synthesis in a pool of worker
+    processes, each with its own pyttsx3 engine created when the service
+    starts. At most max_jobs requests are converted at once and up to
+    max_queued more wait their turn; beyond that requests get 503 with a
+    Retry-After header, decided before any of the request body is read;
+    bodies are streamed to a temporary file rather than held in memory.
+    Each request keeps at most LOOKAHEAD segments in
+    flight and waits for the client to take the audio before synthesizing
+    more, so slow clients hold back only their own conversion.
+    """
+    
+    def __init__(self, workers=None, max_jobs=None, max_queued=16, properties=None, driver_name=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_jobs = max_jobs or self.workers
+        self.max_queued = max_queued
+        self.properties = properties or {}
+        self.driver_name = driver_name  # pyttsx3 driver for the worker engines
+        self.active = 0
+        self.queued = 0
+        self._slots = None  # Created on the event loop in start()
+        self._render_pool = None
+        self._extract_pool = None
+        self._pending = set()  # Pool jobs not done yet, cancelled by close()
+        self._server = None
+        # Extraction stays in-process; the render pool already uses the cores
+        self.extractor = TextExtractor(pdf_workers=1, ocr_workers=1)
+    
+    async def start(self, host='127.0.0.1', port=8765, socket_path=None):
+        """Start the worker pools and listen on a TCP port or a Unix socket"""
+        loop = asyncio.get_running_loop()
+        self._slots = asyncio.Semaphore(self.max_jobs)
+        self._render_pool = ProcessPoolExecutor(max_workers=self.workers, initializer=init_render_engine,
+                                                initargs=(self.driver_name,))
+        self._extract_pool = ThreadPoolExecutor(max_workers=self.max_jobs, thread_name_prefix='service-extract')
+        await asyncio.gather(*(loop.run_in_executor(self._render_pool, _warm_up)
+                               for _ in range(self.workers)))
+        
+        if socket_path:
+            self._server = await asyncio.start_unix_server(self._handle, path=socket_path)
+        else:
+            self._server = await asyncio.start_server(self._handle, host, port)
+        return self._server
+    
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+    
+    def close(self):
+        if self._server is not None:
+            self._server.close()
+        # shutdown(cancel_futures=True) needs Python 3.9
+        for future in list(self._pending):
+            future.cancel()
+        if self._render_pool is not None:
+            self._render_pool.shutdown(wait=False)
+        if self._extract_pool is not None:
+            self._extract_pool.shutdown(wait=False)
+    
+    def _run(self, pool, function, *args):
+        """Like loop.run_in_executor, but close() can cancel the job while it waits"""
+        future = pool.submit(function, *args)
+        self._pending.add(future)
+        future.add_done_callback(self._pending.discard)
+        return asyncio.wrap_future(future)
+    
+    def status(self):
+        return {
+            'active': self.active,
+            'queued': self.queued,
+            'max_jobs': self.max_jobs,
+            'max_queued': self.max_queued,
+            'workers': self.workers,
+            'metrics': METRICS.snapshot(),
+        }
+    
+    async def _handle(self, reader, writer):
+        try:
+            method, target, headers = await self._read_head(reader)
+            url = urlsplit(target)
+            query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+            if url.path == '/status':
+                if method != 'GET':
+                    raise HTTPError(405, "Use GET", {'Allow': 'GET'})
+                await self._send_json(writer, 200, self.status())
+            elif url.path == '/speak':
+                if method != 'POST':
+                    raise HTTPError(405, "Use POST", {'Allow': 'POST'})
+                await self._speak(reader, writer, headers, query)
+            else:
+                raise HTTPError(404, f"No such endpoint: {url.path}")
+        except HTTPError as e:
+            await self._send_json(writer, e.status, {'error': str(e)}, e.headers)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            log.exception("Service error")
+            try:
+                await self._send_json(writer, 500, {'error': str(e)})
+            except ConnectionError:
+                pass
+        finally:
+            writer.close()
+    
+    async def _read_head(self, reader):
+        try:
+            head = await reader.readuntil(b'\r\n\r\n')
+        except asyncio.LimitOverrunError:
+            raise HTTPError(400, "Request header too large")
+        lines = head.decode('latin-1').split('\r\n')
+        try:
+            method, target, _ = lines[0].split(' ', 2)
+        except ValueError:
+            raise HTTPError(400, "Malformed request line")
+        headers = {}
+        for line in lines[1:]:
+            if ':' in line:
+                name, value = line.split(':', 1)
+                headers[name.strip().lower()] = value.strip()
+        return method.upper(), target, headers
+    
+    @staticmethod
+    def _content_length(headers):
+        if 'content-length' not in headers:
+            raise HTTPError(411, "Content-Length is required")
+        try:
+            length = int(headers['content-length'])
+        except ValueError:
+            raise HTTPError(400, "Invalid Content-Length")
+        if length < 0:
+            raise HTTPError(400, "Invalid Content-Length")
+        if length > MAX_BODY_BYTES:
+            raise HTTPError(413, f"Request body is larger than {MAX_BODY_BYTES} bytes")
+        return length
+    
+    def _properties(self, query):
+        properties = dict(self.properties)
+        try:
+            if 'rate' in query:
+                properties['rate'] = int(query['rate'])
+            if 'volume' in query:
+                properties['volume'] = max(0.0, min(1.0, float(query['volume'])))
+        except ValueError:
+            raise HTTPError(400, "rate must be an integer and volume a number")
+        if 'voice' in query:
+            properties['voice'] = query['voice']
+        return properties
+    
+    async def _speak(self, reader, writer, headers, query):
+        properties = self._properties(query)
+        length = self._content_length(headers)
+        content_type = headers.get('content-type', '').split(';')[0].strip().lower()
+        
+        # Backpressure: refuse work beyond the queue before reading the body.
+        # A request counts as queued while it uploads, so a burst of uploads
+        # cannot all be accepted while the job slots still look free
+        if self.active + self.queued >= self.max_jobs + self.max_queued:
+            raise HTTPError(503, "Too many conversions in progress", {'Retry-After': '5'})
+        self.queued += 1
+        path = None
+        try:
+            try:
+                path = await self._save_upload(reader, length, query.get('name', ''))
+                queued_at = time.perf_counter()
+                await self._slots.acquire()
+            finally:
+                self.queued -= 1
+            METRICS.record('service.queue_wait', time.perf_counter() - queued_at)
+            
+            self.active += 1
+            try:
+                if content_type == 'text/plain':
+                    texts = self._iter_request_text(path, headers)
+                else:
+                    texts = self._iter_document_text(path)
+                await self._stream_audio(writer, texts, properties, queued_at)
+            finally:
+                self.active -= 1
+                self._slots.release()
+        finally:
+            if path is not None:
+                os.remove(path)
+    
+    async def _iter_request_text(self, path, headers):
+        """Decode a text/plain upload a block at a time, cut at line breaks"""
+        charset = 'utf-8'
+        for parameter in headers.get('content-type', '').split(';')[1:]:
+            name, _, value = parameter.partition('=')
+            if name.strip().lower() == 'charset' and value.strip():
+                charset = value.strip().strip('"')
+        try:
+            decoder = codecs.getincrementaldecoder(charset)(errors='replace')
+        except LookupError:
+            raise HTTPError(400, f"Unknown charset: {charset}")
+        
+        pending = ""
+        with open(path, 'rb') as file:
+            for block in iter(lambda: file.read(READ_BLOCK_BYTES), b''):
+                # Hold back the unfinished last line so no sentence is split
+                text = pending + decoder.decode(block)
+                cut = text.rfind("\n") + 1
+                pending = text[cut:]
+                if cut:
+                    yield text[:cut]
+        pending += decoder.decode(b'', final=True)
+        if pending:
+            yield pending
+    
+    async def _save_upload(self, reader, length, name):
+        """Copy the request body to a temporary file as it arrives; returns its path"""
+        # Formats are recognised by content; the extension only breaks ties
+        suffix = os.path.splitext(os.path.basename(name))[1].lower()
+        fd, path = tempfile.mkstemp(suffix=suffix if suffix.isascii() else '', prefix='readaloud-upload-')
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                remaining = length
+                while remaining:
+                    block = await reader.readexactly(min(remaining, READ_BLOCK_BYTES))
+                    file.write(block)
+                    remaining -= len(block)
+        except BaseException:
+            os.remove(path)
+            raise
+        return path
+    
+    async def _iter_document_text(self, path):
+        """Extract chunk by chunk in the thread pool, only as fast as audio is needed"""
+        try:
+            chunks = await self._run(self._extract_pool, self.extractor.iter_chunks, path)
+        except ValueError as e:
+            raise HTTPError(400, str(e))
+        while True:
+            chunk = await self._run(self._extract_pool, next, chunks, None)
+            if chunk is None:
+                return
+            yield chunk.text
+    
+    async def _iter_segments(self, texts):
+        """Group the sentences of the request's texts into synthesis segments"""
+        limit = FIRST_SEGMENT_CHARS
+        pending = []
+        size = 0
+        async for text in texts:
+            for start, end in iter_sentences(text):
+                pending.append(text[start:end])
+                size += end - start
+                if size >= limit:
+                    yield "".join(pending)
+                    pending = []
+                    size = 0
+                    limit = SEGMENT_CHARS
+        if pending:
+            yield "".join(pending)
+    
+    async def _stream_audio(self, writer, texts, properties, started):
+        segments = self._iter_segments(texts)
+        in_flight = []
+        header_sent = False
+        params = None
+        try:
+            while True:
+                # Keep LOOKAHEAD segments synthesizing ahead of the one being sent
+                async for segment in segments:
+                    if segment.strip():
+                        in_flight.append(self._run(self._render_pool, render_to_wav, segment, properties))
+                    if len(in_flight) >= LOOKAHEAD:
+                        break
+                if not in_flight:
+                    break
+                
+                segment_params, frames = wav_frames(await in_flight.pop(0))
+                if not header_sent:
+                    params = segment_params
+                    writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: audio/wav\r\n'
+                                 b'Transfer-Encoding: chunked\r\nConnection: close\r\n\r\n')
+                    self._write_chunk(writer, streaming_wav_header(*params))
+                    header_sent = True
+                    METRICS.record('service.first_audio', time.perf_counter() - started)
+                elif segment_params != params:
+                    raise ValueError(f"Speech engine changed audio format mid-stream: {segment_params}")
+                self._write_chunk(writer, frames)
+                # Wait for the client to take the audio before rendering more
+                await writer.drain()
+            
+            if not header_sent:
+                raise HTTPError(400, "The document contains no text to read")
+            writer.write(b'0\r\n\r\n')
+            await writer.drain()
+            METRICS.record('service.request', time.perf_counter() - started)
+        except (HTTPError, ConnectionError):
+            raise
+        except Exception:
+            if not header_sent:
+                raise
+            # The status line is gone; end the connection without the final
+            # chunk so the client sees an incomplete response
+            log.exception("Service error while streaming audio")
+        finally:
+            for future in in_flight:
+                future.cancel()
+            await segments.aclose()
+    
+    @staticmethod
+    def _write_chunk(writer, data):
+        if data:
+            writer.write(f"{len(data):X}\r\n".encode('ascii') + data + b'\r\n')
+    
+    async def _send_json(self, writer, status, payload, headers=None):
+        body = json.dumps(payload).encode('utf-8')
+        lines = [f"HTTP/1.1 {status} {_REASONS.get(status, '')}",
+                 "Content-Type: application/json",
+                 f"Content-Length: {len(body)}",
+                 "Connection: close"]
+        lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode('latin-1') + body)
+        await writer.drain()
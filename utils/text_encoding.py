@@ -0,0 +1,63 @@
+# Guessing the encoding of plain text files from a sample of their bytes
+import codecs
+
+# Bytes looked at when guessing the encoding
+SAMPLE_BYTES = 64 * 1024
+
+# Longest BOMs first: the UTF-32-LE BOM starts with the UTF-16-LE one
+_BOMS = (
+    (codecs.BOM_UTF32_LE, 'utf-32-le'),
+    (codecs.BOM_UTF32_BE, 'utf-32-be'),
+    (codecs.BOM_UTF8, 'utf-8'),
+    (codecs.BOM_UTF16_LE, 'utf-16-le'),
+    (codecs.BOM_UTF16_BE, 'utf-16-be'),
+)
+
+def detect_bom(sample):
+    """(encoding, BOM length) for a sample starting with a byte order mark, else (None, 0)"""
+    for bom, encoding in _BOMS:
+        if sample.startswith(bom):
+            return encoding, len(bom)
+    return None, 0
+
+def utf16_byte_order(sample):
+    """'utf-16-le' or 'utf-16-be' when a BOM-less sample looks like UTF-16, else None
+    
+    Mostly-ASCII text in UTF-16 has a zero in every other byte; which half
+    of each pair is zero gives the byte order.
+    """
+    pairs = len(sample) // 2
+    if pairs < 2:
+        return None
+    even_zeros = sample[0:pairs * 2:2].count(0)
+    odd_zeros = sample[1:pairs * 2:2].count(0)
+    if odd_zeros > pairs * 0.3 and even_zeros < pairs * 0.05:
+        return 'utf-16-le'
+    if even_zeros > pairs * 0.3 and odd_zeros < pairs * 0.05:
+        return 'utf-16-be'
+    return None
+
+def is_utf8(sample):
+    """True when sample decodes as UTF-8, allowing a sequence cut off at the end"""
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+        return True
+    except UnicodeDecodeError:
+        return False
+
+def detect_encoding(sample):
+    """(encoding, BOM length) for text starting with sample
+    
+    Checks for a BOM, then for BOM-less UTF-16, then whether the sample is
+    valid UTF-8, and falls back to cp1252, the usual encoding of legacy
+    Windows text files.
+    """
+    encoding, bom_length = detect_bom(sample)
+    if encoding:
+        return encoding, bom_length
+    encoding = utf16_byte_order(sample)
+    if encoding:
+        return encoding, 0
+    if is_utf8(sample):
+        return 'utf-8', 0
+    return 'cp1252', 0
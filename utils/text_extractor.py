@@ -1,94 +1,169 @@
 import os
-import fitz  # PyMuPDF
-from docx import Document
-import pytesseract
-from PIL import Image
-import ebooklib
-from ebooklib import epub
-from bs4 import BeautifulSoup
+
+# Format backends import their libraries (PyMuPDF, Pillow, pytesseract)
+# inside the methods that use them, so starting the app only pays for the
+# ones needed by the documents actually opened
+from utils.formats import backend_class_for, backend_classes
+from utils.metrics import METRICS
+from utils.ocr import OCRPipeline
+from utils.text_normalizer import normalize_parts
+
+class TextChunk:
+    """A piece of extracted text and where it sits in the full document"""
+    def __init__(self, text, index, offset, kind):
+        self.text = text
+        self.index = index  # Page, paragraph or chapter number (0-based)
+        self.offset = offset  # Character offset of the chunk in the full text
+        self.kind = kind  # 'page', 'paragraph', 'chapter' or 'image'
+    
+    @property
+    def end(self):
+        return self.offset + len(self.text)
 
 class TextExtractor:
-    def __init__(self):
+    # Bump whenever a change alters the extracted text, so cached results
+    # from older versions are not reused
+    VERSION = 6
+    
+    # PDFs with fewer pages than this are extracted serially; process start-up
+    # costs more than it saves on small files
+    PARALLEL_PDF_MIN_PAGES = 64
+    # Pages handed to a worker per task; small enough that the first pages
+    # come back quickly, large enough to amortize opening the document
+    PARALLEL_PDF_BATCH_PAGES = 32
+    
+    def __init__(self, pdf_workers=None, ocr_workers=None, ocr_pdf=True, cache=None, normalize=True):
         # Configure pytesseract path if needed
+        # import pytesseract
         # pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
-        pass
         
+        # Number of worker processes for PDF extraction; None uses every core,
+        # 1 disables the process pool
+        self.pdf_workers = pdf_workers if pdf_workers is not None else (os.cpu_count() or 1)
+        # OCR for images and for PDF pages that have no text layer (scans)
+        self.ocr = OCRPipeline(workers=ocr_workers)
+        self.ocr_pdf = ocr_pdf
+        # Optional ExtractionCache; reopening an unchanged file then skips parsing
+        self.cache = cache
+        # Rejoin hard-wrapped lines and drop running headers in PDF and OCR text
+        self.normalize = normalize
+        self._backends = {}
+    
+    def backend(self, name):
+        """The backend instance registered under name ('pdf', 'docx', ...)"""
+        if name not in self._backends:
+            backend_class = next(backend for backend in backend_classes() if backend.name == name)
+            self._backends[name] = backend_class(self)
+        return self._backends[name]
+    
+    def backend_for(self, file_path):
+        """The backend that reads file_path, chosen by sniffing its content"""
+        return self.backend(backend_class_for(file_path).name)
+    
     def extract_text(self, file_path):
         """Extract text from various file formats"""
+        return "".join(chunk.text for chunk in self.iter_chunks(file_path))
+    
+    def iter_chunks(self, file_path):
+        """Return an iterator of TextChunk objects produced as the document is parsed
+        
+        Chunks are pages for PDF, chapters for EPUB, horizontal bands for
+        images and paragraphs for the other formats. The format is chosen by
+        sniffing the file's content. Joining the chunk texts gives the same
+        result as extract_text().
+        """
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"File not found: {file_path}")
-            
-        file_extension = os.path.splitext(file_path)[1].lower()
         
-        if file_extension == '.pdf':
-            return self.extract_from_pdf(file_path)
-        elif file_extension == '.docx':
-            return self.extract_from_docx(file_path)
-        elif file_extension == '.txt':
-            return self.extract_from_txt(file_path)
-        elif file_extension == '.epub':
-            return self.extract_from_epub(file_path)
-        elif file_extension in ['.png', '.jpg', '.jpeg']:
-            return self.extract_from_image(file_path)
+        with METRICS.timer('extract.open'):
+            backend = self.backend_for(file_path)
+            route = backend.estimate_cost(file_path)
+        parts = self._parts(backend, file_path, route)
+        
+        if self.cache is not None:
+            key = self.cache.key_for(file_path, self._cache_options(backend.name))
+            with METRICS.timer('extract.cache_load'):
+                cached = self.cache.load(key)
+            if cached is not None:
+                return self._number_chunks(iter(cached))
+            parts = self._caching(parts, key)
+        
+        return self._number_chunks(parts)
+    
+    def invalidate_cache(self, file_path=None):
+        """Drop the cached extraction of one file, or the whole cache"""
+        if self.cache is None:
+            return
+        if file_path is None:
+            self.cache.invalidate()
         else:
-            raise ValueError(f"Unsupported file format: {file_extension}")
+            backend_name = self.backend_for(file_path).name
+            self.cache.invalidate(self.cache.key_for(file_path, self._cache_options(backend_name)))
+    
+    def _cache_options(self, backend_name):
+        """Settings that change the extracted text and so belong in the cache key"""
+        return {
+            'version': self.VERSION,
+            'format': backend_name,
+            'ocr_pdf': self.ocr_pdf,
+            'ocr_dpi': self.ocr.dpi,
+            'ocr_threshold': self.ocr.threshold,
+            'normalize': self.normalize,
+        }
+    
+    def _parts(self, backend, file_path, route=None):
+        """(kind, text) pairs from backend, normalized when the format needs it"""
+        # One timing per chunk: a page, chapter, paragraph or image band
+        parts = METRICS.timed_iter(f'extract.parse.{backend.name}', backend.iter_parts(file_path, route))
+        if self.normalize and backend.layout_text:
+            parts = normalize_parts(parts)
+        return parts
+    
+    def _caching(self, parts, key):
+        """Pass chunks through, saving them once the whole document is extracted"""
+        collected = []
+        for part in parts:
+            collected.append(part)
+            yield part
+        self.cache.save(key, collected)
+    
+    def count_chunks(self, file_path):
+        """Return the number of chunks iter_chunks will yield, or None if unknown
+        
+        Only some formats can tell cheaply, such as PDF (its page count) and
+        EPUB (its spine length); the others would need a full parse.
+        """
+        try:
+            return self.backend_for(file_path).count_chunks(file_path)
+        except (OSError, ValueError):
+            return None
+    
+    def _number_chunks(self, parts):
+        """Turn (kind, text) pairs into TextChunk objects with offsets"""
+        offset = 0
+        for index, (kind, text) in enumerate(parts):
+            yield TextChunk(text, index, offset, kind)
+            offset += len(text)
     
     def extract_from_pdf(self, file_path):
         """Extract text from PDF using PyMuPDF"""
-        try:
-            text = ""
-            with fitz.open(file_path) as doc:
-                for page in doc:
-                    text += page.get_text()
-            return text
-        except Exception as e:
-            raise Exception(f"Error extracting text from PDF: {str(e)}")
+        return self._join_parts('pdf', file_path)
     
     def extract_from_docx(self, file_path):
-        """Extract text from DOCX using python-docx"""
-        try:
-            doc = Document(file_path)
-            text = ""
-            for paragraph in doc.paragraphs:
-                text += paragraph.text + "\n"
-            return text
-        except Exception as e:
-            raise Exception(f"Error extracting text from DOCX: {str(e)}")
+        """Extract text from DOCX paragraphs and tables"""
+        return self._join_parts('docx', file_path)
     
     def extract_from_txt(self, file_path):
         """Extract text from TXT file"""
-        try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                return file.read()
-        except UnicodeDecodeError:
-            # Try with a different encoding if UTF-8 fails
-            with open(file_path, 'r', encoding='latin-1') as file:
-                return file.read()
-        except Exception as e:
-            raise Exception(f"Error extracting text from TXT: {str(e)}")
+        return self._join_parts('txt', file_path)
     
     def extract_from_epub(self, file_path):
-        """Extract text from EPUB using ebooklib"""
-        try:
-            book = epub.read_epub(file_path)
-            text = ""
-            
-            for item in book.get_items():
-                if item.get_type() == ebooklib.ITEM_DOCUMENT:
-                    # Parse HTML content
-                    soup = BeautifulSoup(item.get_content(), 'html.parser')
-                    content_text = soup.get_text()
-                    text += content_text + "\n"
-                    
-            return text
-        except Exception as e:
-            raise Exception(f"Error extracting text from EPUB: {str(e)}")
+        """Extract text from EPUB in spine order"""
+        return self._join_parts('epub', file_path)
     
     def extract_from_image(self, file_path):
         """Extract text from image using pytesseract OCR"""
-        try:
-            image = Image.open(file_path)
-            text = pytesseract.image_to_string(image)
-            return text
-        except Exception as e:
-            raise Exception(f"Error extracting text from image: {str(e)}")
+        return self._join_parts('image', file_path)
+    
+    def _join_parts(self, backend_name, file_path):
+        return "".join(text for _, text in self._parts(self.backend(backend_name), file_path))
@@ -0,0 +1,180 @@
+# Cleans up layout artifacts in page text before it is shown and spoken
+import re
+from collections import Counter, deque
+
+from utils.metrics import METRICS
+
+# Hard-wrapped lines whose length is below this fraction of the page's
+# typical line length end a paragraph (or are headings)
+SHORT_LINE_FRACTION = 0.6
+# Lines in these positions at the top and bottom of a page may be running
+# headers, footers or page numbers
+EDGE_LINES = 2
+# Longer lines are body text, never running headers
+MAX_EDGE_LINE_CHARS = 100
+
+_DIGITS = re.compile(r'\d+')
+_SPACES = re.compile(r'\s+')
+_BULLET = re.compile(r'(?:[-•*▪◦‣–]|\d{1,3}[.)]|[a-zA-Z][.)])\s')
+_TERMINAL = re.compile(r'[.!?:;…][\'")\]’”]*$')
+
+def _edge_key(line):
+    """Header/footer identity of a line: page numbers and dates vary, the rest does not"""
+    return _SPACES.sub(' ', _DIGITS.sub('#', line.lower()))
+
+def _ends_with_split_word(text):
+    """Whether text ends with a word hyphenated at a line break ("exam-")"""
+    return len(text) > 1 and text[-1] == '-' and text[-2].isalpha()
+
+def _typical_length(lines):
+    lengths = sorted(len(line) for line in lines if line)
+    if not lengths:
+        return 0
+    return lengths[int(0.9 * (len(lengths) - 1))]
+
+def _lines(text):
+    # Soft hyphens only mark where a word may be split; they are never read
+    return [line.strip() for line in text.replace('\u00ad', '').splitlines()]
+
+def reflow(lines):
+    """Join hard-wrapped lines into paragraphs
+    
+    lines are stripped lines of one page. Words hyphenated across a line
+    break are rejoined, list items keep their own line, and blank lines,
+    short lines that end a sentence and short headings end a paragraph.
+    Returns (text, ends_paragraph); text has no trailing newline.
+    """
+    typical = _typical_length(lines)
+    paragraphs = []
+    current = ""
+    ends_paragraph = True
+    for index, line in enumerate(lines):
+        if not line:
+            if current:
+                paragraphs.append(current)
+                current = ""
+            continue
+        
+        if not current:
+            current = line
+        elif _BULLET.match(line):
+            current += "\n" + line
+        elif _ends_with_split_word(current) and line[0].islower():
+            current = current[:-1] + line
+        else:
+            current += " " + line
+        
+        next_line = lines[index + 1] if index + 1 < len(lines) else ""
+        short = len(line) < typical * SHORT_LINE_FRACTION
+        ends_paragraph = short and (_TERMINAL.search(line) is not None
+                                    or next_line[:1].isupper() or next_line[:1].isdigit())
+        if ends_paragraph and next_line:
+            paragraphs.append(current)
+            current = ""
+    if current:
+        paragraphs.append(current)
+    return "\n\n".join(paragraphs), ends_paragraph
+
+class PageNormalizer:
+    """Normalizes pages incrementally for reading aloud
+    
+    Running headers, footers and page numbers are found by how often a line
+    (with its digits ignored) recurs at the top or bottom of the last
+    `window` pages, so chapter titles repeated as headers are caught too.
+    Pages are held back only until `lookahead` later pages have
+    arrived, so reading can start while the rest of the document is still
+    being extracted.
+    """
+    
+    def __init__(self, lookahead=2, window=16, min_repeats=2, repeat_fraction=0.5):
+        self.lookahead = lookahead
+        self.min_repeats = min_repeats
+        self.repeat_fraction = repeat_fraction
+        self._edge_counts = Counter()
+        self._window = deque(maxlen=window)  # Edge keys of recent pages
+        self._pending = deque()  # Stripped lines of pages not yet returned
+    
+    def _edges(self, lines):
+        content = [index for index, line in enumerate(lines) if line]
+        return set(content[:EDGE_LINES] + content[-EDGE_LINES:])
+    
+    def add_page(self, text):
+        """Queue a page; returns the normalized pages that are now final"""
+        lines = _lines(text)
+        keys = {_edge_key(lines[index]) for index in self._edges(lines)
+                if len(lines[index]) <= MAX_EDGE_LINE_CHARS}
+        if len(self._window) == self._window.maxlen:
+            self._edge_counts.subtract(self._window[0])
+        self._window.append(keys)
+        self._edge_counts.update(keys)
+        self._pending.append(lines)
+        
+        ready = []
+        while len(self._pending) > self.lookahead:
+            ready.append(self._finish_page())
+        return ready
+    
+    def finish(self):
+        """Return the pages still held back, at the end of the document"""
+        ready = []
+        while self._pending:
+            ready.append(self._finish_page())
+        return ready
+    
+    def _is_repeated(self, line):
+        if len(line) > MAX_EDGE_LINE_CHARS:
+            return False
+        count = self._edge_counts[_edge_key(line)]
+        return count >= max(self.min_repeats, self.repeat_fraction * len(self._window))
+    
+    def _strip_edges(self, lines):
+        """Blank out running headers and footers, unless nothing else is on the page"""
+        repeated = [index for index in self._edges(lines) if self._is_repeated(lines[index])]
+        if len(repeated) == sum(1 for line in lines if line):
+            return lines
+        lines = list(lines)
+        for index in repeated:
+            lines[index] = ""
+        return lines
+    
+    def _finish_page(self):
+        lines = self._strip_edges(self._pending.popleft())
+        text, ends_paragraph = reflow(lines)
+        if not text:
+            return ""
+        
+        following = self._strip_edges(self._pending[0]) if self._pending else []
+        first_following = next((line for line in following if line), "")
+        if _ends_with_split_word(text) and first_following[:1].islower():
+            # The word continues on the next page
+            return text[:-1]
+        return text + ("\n\n" if ends_paragraph else "\n")
+
+def normalize_parts(parts):
+    """Normalize 'page' and 'image' chunks of a (kind, text) stream
+    
+    Pages get the full treatment; OCR'd image bands are only reflowed, as
+    they are slices of a single page. Other kinds pass through unchanged.
+    """
+    pages = PageNormalizer()
+    for kind, text in parts:
+        if kind == 'page':
+            with METRICS.timer('extract.normalize'):
+                ready = pages.add_page(text)
+            for page in ready:
+                yield kind, page
+            continue
+        
+        with METRICS.timer('extract.normalize'):
+            ready = pages.finish()
+            if kind == 'image':
+                text, ends_paragraph = reflow(_lines(text))
+                if text:
+                    text += "\n\n" if ends_paragraph else "\n"
+        for page in ready:
+            yield 'page', page
+        yield kind, text
+    with METRICS.timer('extract.normalize'):
+        ready = pages.finish()
+    for page in ready:
+        yield 'page', page
@@ -0,0 +1,96 @@
+# Splits text into sentence-sized spans for speech
+import re
+
+# Sentence end: terminal punctuation plus any closing quotes/brackets, then
+# whitespace; or a blank line (paragraph break)
+_SENTENCE_END = re.compile(r'[.!?…]+[\'")\]’”]*\s+|\n[ \t]*\n\s*')
+# Preferred places to break an over-long sentence, best first
+_CLAUSE_BREAK = re.compile(r'[,;:–—]\s+')
+_WORD_BREAK = re.compile(r'\s+')
+# Word (or dotted abbreviation like "e.g") right before a full stop
+_WORD_BEFORE = re.compile(r'(\w+(?:\.\w+)*)$')
+
+# A full stop after these never ends a sentence ("Dr. Smith")
+TITLES = {
+    'mr', 'mrs', 'ms', 'dr', 'prof', 'sr', 'jr', 'st', 'mt', 'rev', 'gen',
+    'col', 'capt', 'lt', 'sgt', 'hon', 'messrs',
+}
+# A full stop after these ends a sentence only if a capital letter follows
+ABBREVIATIONS = {
+    'etc', 'e.g', 'i.e', 'vs', 'cf', 'fig', 'figs', 'no', 'nos', 'vol', 'vols',
+    'pp', 'ch', 'sec', 'approx', 'inc', 'ltd', 'co', 'corp', 'dept', 'est',
+    'al', 'jan', 'feb', 'mar', 'apr', 'jun', 'jul', 'aug', 'sep', 'sept',
+    'oct', 'nov', 'dec', 'a.m', 'p.m',
+}
+
+# Sentences longer than this are split at clause or word boundaries so a
+# single utterance never grows unbounded
+MAX_CHUNK_CHARS = 300
+
+def iter_sentences(text, start=0, max_chars=MAX_CHUNK_CHARS):
+    """Yield (start, end) spans of the sentences in text from start onward
+    
+    Spans index into text directly, so no copy of the remaining document is
+    made. Whitespace-only spans are skipped.
+    """
+    length = len(text)
+    pos = start
+    while pos < length:
+        # Only text within reach of the limit is searched, so a long
+        # unpunctuated document is not scanned to its end for every span
+        end = _sentence_end(text, pos, pos + max_chars + 1)
+        
+        while end is None or end - pos > max_chars:
+            cut = _split_point(text, pos, pos + max_chars)
+            if text[pos:cut].strip():
+                yield pos, cut
+            pos = cut
+            if end is None:
+                end = _sentence_end(text, pos, pos + max_chars + 1)
+        
+        if text[pos:end].strip():
+            yield pos, end
+        pos = end
+
+def _sentence_end(text, pos, stop):
+    """End of the sentence starting at pos, skipping full stops of abbreviations
+    
+    Only text before stop is searched; None if the sentence may run past it.
+    """
+    while True:
+        match = _SENTENCE_END.search(text, pos, stop)
+        if match is None or match.end() >= stop:
+            # Nothing found, or trailing whitespace that stop may have cut off
+            return len(text) if stop >= len(text) else None
+        if not _is_abbreviation(text, match):
+            return match.end()
+        pos = match.end()
+
+def _is_abbreviation(text, match):
+    """Whether a sentence-end match is really the full stop of an abbreviation or initial"""
+    stop = match.start()
+    if text[stop] != '.' or text.startswith('..', stop) or match.group().count('\n') > 1:
+        return False
+    word = _WORD_BEFORE.search(text, max(0, stop - 16), stop)
+    if word is None:
+        return False
+    word = word.group(1)
+    if len(word) == 1 and word.isupper():
+        return True  # An initial, as in "J. R. R. Tolkien"
+    word = word.lower()
+    if word in TITLES:
+        return True
+    if word in ABBREVIATIONS:
+        following = text[match.end():match.end() + 1]
+        return not following[:1].isupper()
+    return False
+
+def _split_point(text, start, limit):
+    """Last clause or word boundary in text[start:limit], or limit itself"""
+    for pattern in (_CLAUSE_BREAK, _WORD_BREAK):
+        cut = None
+        for match in pattern.finditer(text, start + 1, limit):
+            cut = match.end()
+        if cut is not None:
+            return cut
+    return limit
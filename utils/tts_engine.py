@@ -1,172 +1,484 @@
+import logging
 import pyttsx3
 import threading
 import queue
+import time
+from collections import deque
 from PyQt5.QtCore import QObject, pyqtSignal
 
+from utils.audio_pipeline import PrerenderedPlayback
+from utils.metrics import METRICS
+from utils.position_index import PositionIndex
+from utils.text_segmenter import iter_sentences
+
+log = logging.getLogger('readaloud.tts')
+
 class TTSCommand:
     """Command objects for the TTS queue"""
     def __init__(self, command_type, value=None):
-        self.type = command_type  # 'play', 'pause', 'stop', 'rate', 'volume', 'rewind', 'forward'
+        self.type = command_type  # 'play', 'pause', 'stop', 'seek', 'rate', 'volume', 'text', 'quit'
         self.value = value
+        self.created = time.perf_counter()  # For the command latency metric
 
 class TTSEngine(QObject):
     """Text-to-speech engine that runs in a separate thread"""
     
-    status_changed = pyqtSignal(str)
+    status_changed = pyqtSignal(str)  # 'playing', 'paused', 'stopped' or 'finished'
+    position_changed = pyqtSignal(int, int)  # Offset being spoken, word length (0 if unknown)
+    voices_ready = pyqtSignal(list)  # [(name, id), ...] once the engine is up
+    
+    # Sentences queued in pyttsx3 ahead of the one being spoken; the next
+    # sentence is always ready so there is no gap between utterances
+    SENTENCE_WINDOW = 2
+    # While speaking the worker pumps the driver loop and checks for commands
+    # this often (seconds); when idle it blocks on the queue instead
+    ITERATE_INTERVAL = 0.005
+    # Characters indexed ahead of the reading position; the position index
+    # grows incrementally instead of being built for the whole book up front
+    INDEX_AHEAD = 16384
+    # Minimum time between position_changed signals; word callbacks arriving
+    # faster than this are coalesced so fast speech cannot flood the GUI
+    POSITION_SIGNAL_INTERVAL = 0.05
     
-    def __init__(self):
+    def __init__(self, prerender=False, lookahead=4, audio_cache=None, driver_name=None):
         super().__init__()
-        self.engine = pyttsx3.init()
-        self.text = ""
+        # Created by the worker thread, which owns it; see _init_engine
+        self.engine = None
+        # pyttsx3 driver module; None picks the platform's default
+        self.driver_name = driver_name
+        self.voices = []
+        # Appended text waits in _text_parts until the text is next read;
+        # _text_lock guards both since the GUI and worker threads read it
+        self._text_parts = []
+        self._text = ""
+        self._text_lock = threading.Lock()
+        self._length = 0
+        # False while text is still being appended; reading that catches up
+        # with the end then waits for more instead of finishing
+        self._text_complete = True
         self.current_position = 0
         self.is_paused = False
         self.is_stopped = True
         
+        # Boundaries and estimated timings used for seeking; shared with the
+        # worker thread, which refines the timings from word callbacks
+        self.index = PositionIndex()
+        self._index_lock = threading.Lock()
+        self._last_word = None  # (time, position) of the previous word callback
+        self._utterance_started = None  # When the driver began the current utterance
+        self._first_word_pending = False
+        self._word_length = 0
+        self._last_position_signal = 0.0
+        self._position_dirty = False
+        
         # Default properties
-        self.engine.setProperty('rate', 150)  # Speed (words per minute)
-        self.engine.setProperty('volume', 0.75)  # Volume (0.0 to 1.0)
+        self.rate = 150  # Speed (words per minute)
+        self.volume = 0.75  # Volume (0.0 to 1.0)
+        self.voice = None
+        
+        # Worker-side playback state, only touched from the worker thread
+        self._speaking = False
+        self._next_position = 0
+        self._queued = deque()  # (start, end) spans handed to pyttsx3
         
         # Command queue for thread communication
         self.command_queue = queue.Queue()
         
         # Worker thread
         self.worker_thread = None
+        
+        # Optional offline mode: sentences are synthesized to WAV buffers
+        # ahead of the playhead and played back by the audio pipeline;
+        # with an AudioCache, sentences heard before are not synthesized again
+        self.playback = None
+        if prerender:
+            self.playback = PrerenderedPlayback(lambda: self.text, self._on_playback_position,
+                                                self._on_playback_finished, lookahead, audio_cache)
+            self.playback.set_property('rate', self.rate)
+            self.playback.set_property('volume', self.volume)
+        
+        # Start the speech engine in the background; initialising pyttsx3 and
+        # listing voices can take a while and must not hold up the window
+        self._ensure_worker()
     
-    def set_text(self, text):
-        """Set the text to be read"""
-        self.text = text
+    @property
+    def text(self):
+        """The full document text"""
+        with self._text_lock:
+            if self._text_parts:
+                self._text += "".join(self._text_parts)
+                self._text_parts = []
+            return self._text
+    
+    def set_text(self, text, complete=True):
+        """Set the text to be read
+        
+        Pass complete=False when more will follow through append_text().
+        """
+        self.stop()
+        with self._text_lock:
+            self._text_parts = []
+            self._text = text
+            self._length = len(text)
+        self._text_complete = complete
+        self._notify_text()
+        with self._index_lock:
+            self.index.clear()
         self.current_position = 0
         self.is_stopped = True
         self.is_paused = False
     
+    def append_text(self, text, new_page=False):
+        """Append more text to the end of the document being read
+        
+        new_page marks the text as the start of a page or chapter for
+        seek_by('page', ...). The document counts as unfinished until
+        finish_text() is called: reading that reaches the end waits for
+        more text instead of reporting 'finished'.
+        """
+        if new_page:
+            with self._index_lock:
+                self.index.add_page(self._length)
+        with self._text_lock:
+            self._text_parts.append(text)
+            self._length += len(text)
+        self._text_complete = False
+        self._notify_text()
+    
+    def finish_text(self):
+        """Mark the appended text as the whole document"""
+        self._text_complete = True
+        self._notify_text()
+    
+    def _notify_text(self):
+        # Wakes a worker that is waiting for more text
+        if self.playback:
+            self.playback.text_changed(self._text_complete)
+        elif not self.is_stopped:
+            self.command_queue.put(TTSCommand('text'))
+    
     def play(self):
         """Start or resume reading"""
-        if self.is_stopped:
+        if self.is_stopped or self.is_paused:
             self.is_stopped = False
             self.is_paused = False
-            
-            # Start worker thread if not running
-            if not self.worker_thread or not self.worker_thread.is_alive():
-                self.worker_thread = threading.Thread(target=self._worker)
-                self.worker_thread.daemon = True
-                self.worker_thread.start()
-                
-            # Send play command to the worker
-            self.command_queue.put(TTSCommand('play'))
-        elif self.is_paused:
-            # Resume from paused state
-            self.is_paused = False
+            self.status_changed.emit('playing')
+            if self.playback:
+                self.playback.play(self.current_position)
+                return
+            self._ensure_worker()
             self.command_queue.put(TTSCommand('play'))
     
     def pause(self):
         """Pause reading"""
         if not self.is_stopped and not self.is_paused:
             self.is_paused = True
-            self.command_queue.put(TTSCommand('pause'))
+            self.status_changed.emit('paused')
+            if self.playback:
+                self.playback.pause()
+            else:
+                self.command_queue.put(TTSCommand('pause'))
     
     def stop(self):
         """Stop reading and reset position"""
         if not self.is_stopped:
             self.is_stopped = True
             self.is_paused = False
-            self.current_position = 0
-            self.command_queue.put(TTSCommand('stop'))
+            self.status_changed.emit('stopped')
+            if self.playback:
+                self.playback.stop()
+            else:
+                self.command_queue.put(TTSCommand('stop'))
+        self.current_position = 0
     
     def rewind(self):
         """Rewind by approximately 5 seconds"""
-        if self.text:
-            # Approximate rewind by character count 
-            # (assumes 15 characters per second at normal speed)
-            chars_per_second = 15 * (self.engine.getProperty('rate') / 150)
-            rewind_chars = int(5 * chars_per_second)
-            
-            new_position = max(0, self.current_position - rewind_chars)
-            
-            was_playing = not self.is_paused and not self.is_stopped
-            self.stop()
-            
-            self.current_position = new_position
-            
-            if was_playing:
-                self.play()
+        self.seek_seconds(-5)
     
     def forward(self):
         """Forward by approximately 5 seconds"""
-        if self.text:
-            # Approximate forward by character count
-            chars_per_second = 15 * (self.engine.getProperty('rate') / 150)
-            forward_chars = int(5 * chars_per_second)
-            
-            new_position = min(len(self.text), self.current_position + forward_chars)
-            
-            was_playing = not self.is_paused and not self.is_stopped
-            self.stop()
-            
-            self.current_position = new_position
-            
-            if was_playing:
-                self.play()
+        self.seek_seconds(5)
+    
+    def seek_seconds(self, seconds):
+        """Move the reading position by an estimated number of seconds"""
+        if not self._length:
+            return
+        with self._index_lock:
+            # Index a generous distance past the target (roughly 15 characters per second)
+            self._update_index(self.current_position + int(abs(seconds) * 60) + self.INDEX_AHEAD)
+            target = self.index.time_at(self.current_position, self.rate) + seconds
+            position = self.index.position_at_time(target, self.rate)
+        self._seek_to(position)
+    
+    def seek_by(self, level, count):
+        """Move by count words, sentences, paragraphs or pages (negative is back)"""
+        if not self._length:
+            return
+        with self._index_lock:
+            if level == 'word' or level == 'sentence' or count < 0:
+                self._update_index(self.current_position + self.INDEX_AHEAD * max(1, count))
+            else:
+                # Paragraphs and pages can be far apart; index everything
+                self._update_index()
+            position = self.index.step(self.current_position, level, count)
+        self._seek_to(position)
+    
+    def seek(self, position):
+        """Continue reading from the start of the word at a character offset"""
+        position = max(0, min(self._length, position))
+        with self._index_lock:
+            self._update_index(position + 1)
+            position = self.index.snap(position)
+        self._seek_to(position)
+    
+    def _update_index(self, limit=None):
+        # Caller holds _index_lock
+        if self.index.indexed_length < min(self._length, limit or self._length):
+            self.index.extend(self.text, limit)
+    
+    def _seek_to(self, position):
+        self.current_position = position
+        if self.playback:
+            if not self.is_stopped and not self.is_paused:
+                self.playback.seek(position)
+        elif not self.is_stopped:
+            self.command_queue.put(TTSCommand('seek', position))
     
     def set_rate(self, rate):
         """Set speech rate (speed)"""
-        self.command_queue.put(TTSCommand('rate', rate * 100))
+        self.rate = rate * 100
+        if self.playback:
+            self.playback.set_property('rate', self.rate)
+        else:
+            self.command_queue.put(TTSCommand('rate', self.rate))
+    
+    def set_voice(self, voice_id):
+        """Select one of the voice ids reported by voices_ready"""
+        self.voice = voice_id
+        if self.playback:
+            self.playback.set_property('voice', voice_id)
+        else:
+            self.command_queue.put(TTSCommand('voice', voice_id))
     
     def set_volume(self, volume):
         """Set speech volume (0.0 to 1.0)"""
-        self.command_queue.put(TTSCommand('volume', volume))
+        self.volume = volume
+        if self.playback:
+            self.playback.set_property('volume', volume)
+        else:
+            self.command_queue.put(TTSCommand('volume', volume))
     
-    def _worker(self):
-        """Worker thread that processes TTS commands"""
-        engine = self.engine
+    def prefetch(self, text):
+        """Synthesize the start of a document that will be read next
         
-        # Setup callbacks
-        def onWord(name, location, length):
-            self.current_position = location
+        Only prerendered playback with an audio cache has anywhere to keep
+        the audio; live speech is synthesized as it is spoken.
+        """
+        if self.playback:
+            self.playback.prefetch(text)
+    
+    def shutdown(self):
+        """Stop speaking and end the worker thread"""
+        if self.playback:
+            self.playback.shutdown()
+        if self.worker_thread and self.worker_thread.is_alive():
+            self.command_queue.put(TTSCommand('quit'))
+    
+    def _ensure_worker(self):
+        # Start worker thread if not running
+        if not self.worker_thread or not self.worker_thread.is_alive():
+            self.worker_thread = threading.Thread(target=self._worker)
+            self.worker_thread.daemon = True
+            self.worker_thread.start()
+    
+    def sentence_bounds(self, position):
+        """(start, end) of the sentence containing position, for highlighting"""
+        with self._index_lock:
+            self._update_index(position + self.INDEX_AHEAD)
+            return self.index.sentence_at(position)
+    
+    def _report_position(self, position, length, force=False):
+        """Record the spoken position and emit position_changed, throttled"""
+        self.current_position = position
+        self._word_length = length
+        now = time.perf_counter()
+        if force or now - self._last_position_signal >= self.POSITION_SIGNAL_INTERVAL:
+            self._last_position_signal = now
+            self._position_dirty = False
+            self.position_changed.emit(position, length)
+        else:
+            self._position_dirty = True
+    
+    def _flush_position(self):
+        """Emit a position that was held back by the throttle once it is due"""
+        if self._position_dirty and time.perf_counter() - self._last_position_signal >= self.POSITION_SIGNAL_INTERVAL:
+            self._report_position(self.current_position, self._word_length, force=True)
+    
+    def _on_playback_position(self, position):
+        # One call per sentence, far below the throttle interval
+        if not self.is_stopped:
+            self._report_position(position, 0, force=True)
+    
+    def _on_playback_finished(self):
+        self.is_stopped = True
+        self.current_position = 0
+        self.status_changed.emit('finished')
+    
+    def _on_utterance_started(self, name):
+        self._utterance_started = time.perf_counter()
+        self._first_word_pending = True
+    
+    def _on_word(self, name, location, length):
+        if name is None:
+            return
+        position = int(name) + location
+        now = time.perf_counter()
+        if self._first_word_pending and self._utterance_started is not None:
+            # How long the driver took to synthesize the start of a sentence
+            self._first_word_pending = False
+            METRICS.record('tts.first_word', now - self._utterance_started)
         
-        def onEnd(name, completed):
-            if completed:
-                self.is_stopped = True
-                self.current_position = 0
+        # Refine the seek estimates with how long the engine really took
+        last = self._last_word
+        if last is not None and last[1] < position and now - last[0] < 5:
+            with self._index_lock:
+                if position <= self.index.indexed_length:
+                    self.index.calibrate(last[1], position, now - last[0], self.rate)
+        self._last_word = (now, position)
+        self._report_position(position, length)
+    
+    def _on_utterance_finished(self, name, completed):
+        if completed and self._utterance_started is not None:
+            METRICS.record('tts.utterance', time.perf_counter() - self._utterance_started)
+        self._utterance_started = None
+        if completed and self._queued and str(self._queued[0][0]) == name:
+            self.current_position = self._queued.popleft()[1]
+    
+    def _fill_window(self, engine):
+        """Keep SENTENCE_WINDOW sentences queued; returns False at the end of the text"""
+        if len(self._queued) >= self.SENTENCE_WINDOW:
+            return True
         
-        engine.connect('started-word', onWord)
-        engine.connect('finished-utterance', onEnd)
+        text = self.text
+        with self._index_lock:
+            self._update_index(self._next_position + self.INDEX_AHEAD)
+        for start, end in iter_sentences(text, self._next_position):
+            engine.say(text[start:end], str(start))
+            self._queued.append((start, end))
+            self._next_position = end
+            if len(self._queued) >= self.SENTENCE_WINDOW:
+                break
+        METRICS.gauge('tts.queued_sentences', len(self._queued))
+        return bool(self._queued)
+    
+    def _interrupt(self, engine):
+        """Drop everything queued in pyttsx3"""
+        self._last_word = None
+        if self._queued:
+            engine.stop()
+            self._queued.clear()
+    
+    def _handle_command(self, cmd, engine):
+        if cmd.type == 'play':
+            if not self._speaking:
+                self._speaking = True
+                self._next_position = self.current_position
         
-        while not self.is_stopped or not self.command_queue.empty():
-            try:
-                # Check for commands
+        elif cmd.type == 'pause':
+            # Resume picks up from the last word reported by the engine
+            self._speaking = False
+            self._interrupt(engine)
+        
+        elif cmd.type == 'stop':
+            self._speaking = False
+            self._interrupt(engine)
+        
+        elif cmd.type == 'text':
+            # More text or the end of it; the loop picks either up
+            pass
+        
+        elif cmd.type == 'seek':
+            self._interrupt(engine)
+            self._next_position = cmd.value
+        
+        elif cmd.type in ('rate', 'volume', 'voice'):
+            engine.setProperty(cmd.type, cmd.value)
+            # Property changes only apply to new utterances, so re-queue
+            # from the current word to make them audible straight away
+            if self._speaking and self._queued:
+                self._interrupt(engine)
+                self._next_position = self.current_position
+    
+    def _init_engine(self):
+        """Create the pyttsx3 engine on the worker thread and report its voices"""
+        if self.engine is None:
+            engine = pyttsx3.init(self.driver_name)
+            engine.setProperty('rate', self.rate)
+            engine.setProperty('volume', self.volume)
+            if self.voice is not None:
+                engine.setProperty('voice', self.voice)
+            
+            # Utterances are named after their start offset in the document, so
+            # callbacks map straight back to a document position
+            engine.connect('started-utterance', self._on_utterance_started)
+            engine.connect('started-word', self._on_word)
+            engine.connect('finished-utterance', self._on_utterance_finished)
+            
+            self.voices = [(voice.name, voice.id) for voice in engine.getProperty('voices')]
+            self.engine = engine
+            self.voices_ready.emit(self.voices)
+        return self.engine
+    
+    def _worker(self):
+        """Worker thread that processes TTS commands
+        
+        Blocks on the command queue while idle. While speaking it drives
+        pyttsx3 through its external event loop (startLoop(False) plus
+        iterate()), so commands are handled between driver iterations
+        instead of waiting for a whole utterance to finish.
+        """
+        try:
+            with METRICS.timer('tts.init'):
+                engine = self._init_engine()
+        except Exception:
+            log.exception("TTS engine error")
+            return
+        engine.startLoop(False)
+        
+        try:
+            while True:
                 try:
-                    cmd = self.command_queue.get(block=False)
-                    
-                    if cmd.type == 'play':
-                        if self.is_paused:
-                            engine.resume()
+                    if self._speaking:
+                        engine.iterate()
+                        self._flush_position()
+                        if self._fill_window(engine):
+                            cmd = self.command_queue.get(timeout=self.ITERATE_INTERVAL)
+                        elif self._text_complete:
+                            # Reached the end of the document
+                            self._speaking = False
+                            self.is_stopped = True
+                            self.current_position = 0
+                            self.status_changed.emit('finished')
+                            continue
                         else:
-                            # Start from current position
-                            text_to_read = self.text[self.current_position:]
-                            engine.say(text_to_read)
-                            engine.runAndWait()
-                    
-                    elif cmd.type == 'pause':
-                        engine.pause()
-                    
-                    elif cmd.type == 'stop':
-                        engine.stop()
-                    
-                    elif cmd.type == 'rate':
-                        engine.setProperty('rate', cmd.value)
-                    
-                    elif cmd.type == 'volume':
-                        engine.setProperty('volume', cmd.value)
-                    
-                    self.command_queue.task_done()
-                    
+                            # Caught up with extraction; append_text and
+                            # finish_text post a command when there is news
+                            cmd = self.command_queue.get()
+                    else:
+                        cmd = self.command_queue.get()
                 except queue.Empty:
-                    # No commands to process
-                    pass
+                    continue
                 
-                # Small delay to prevent CPU hogging
-                threading.Event().wait(0.1)
-                
-            except Exception as e:
-                print(f"TTS worker error: {str(e)}")
-                break
+                METRICS.record(f'tts.command.{cmd.type}', time.perf_counter() - cmd.created)
+                METRICS.gauge('tts.command_queue', self.command_queue.qsize())
+                try:
+                    if cmd.type == 'quit':
+                        self._interrupt(engine)
+                        break
+                    self._handle_command(cmd, engine)
+                except Exception:
+                    log.exception("TTS worker error")
+                finally:
+                    self.command_queue.task_done()
+        finally:
+            engine.endLoop()